@@ -0,0 +1,52 @@
+"""User search indexes
+
+Revision ID: c41d9e2a7f10
+Revises: 5ba52bdb2270
+Create Date: 2026-10-17 13:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d9e2a7f10'
+down_revision: Union[str, None] = '5ba52bdb2270'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # CONCURRENTLY не блокирует запись в users, но не работает внутри транзакции
+    with op.get_context().autocommit_block():
+        # Префиксный поиск и сортировка: lower(x) COLLATE "C" позволяет
+        # LIKE 'abc%' и ORDER BY по тому же индексу, id - для keyset-пагинации
+        op.create_index(
+            'ix_users_name_lower', 'users', [sa.text('lower(name) COLLATE "C"'), 'id'],
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_users_email_lower', 'users', [sa.text('lower(email) COLLATE "C"'), 'id'],
+            postgresql_concurrently=True
+        )
+        # Поиск по подстроке и по домену email (LIKE '%abc%', LIKE '%@domain')
+        op.create_index(
+            'ix_users_name_trgm', 'users', [sa.text('lower(name) gin_trgm_ops')],
+            postgresql_using='gin', postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_users_email_trgm', 'users', [sa.text('lower(email) gin_trgm_ops')],
+            postgresql_using='gin', postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in ('ix_users_email_trgm', 'ix_users_name_trgm', 'ix_users_email_lower', 'ix_users_name_lower'):
+            op.drop_index(name, table_name='users', postgresql_concurrently=True)
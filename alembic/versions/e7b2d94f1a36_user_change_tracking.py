@@ -0,0 +1,50 @@
+"""User change tracking: updated_at and tombstones
+
+Revision ID: e7b2d94f1a36
+Revises: c41d9e2a7f10
+Create Date: 2026-10-17 15:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b2d94f1a36'
+down_revision: Union[str, None] = 'c41d9e2a7f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Default now() вычисляется один раз: таблица не переписывается,
+    # существующие строки получают время миграции
+    op.add_column(
+        'users',
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
+    )
+    op.create_table(
+        'user_tombstones',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_user_tombstones_deleted_at', 'user_tombstones', ['deleted_at', 'id'])
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_updated_at', 'users', ['updated_at', 'id'],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_updated_at', table_name='users', postgresql_concurrently=True)
+    op.drop_index('ix_user_tombstones_deleted_at', table_name='user_tombstones')
+    op.drop_table('user_tombstones')
+    op.drop_column('users', 'updated_at')
@@ -0,0 +1,36 @@
+"""User email domain index
+
+Revision ID: f3a9c5e1d208
+Revises: e7b2d94f1a36
+Create Date: 2026-10-18 10:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c5e1d208'
+down_revision: Union[str, None] = 'e7b2d94f1a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        # Фильтр по домену - равенство по первой колонке, дальше порядок
+        # (lower(email), id) для keyset-пагинации, как в ix_users_email_lower
+        op.create_index(
+            'ix_users_email_domain', 'users',
+            [sa.text("split_part(lower(email), '@', 2)"), sa.text('lower(email) COLLATE "C"'), 'id'],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_email_domain', table_name='users', postgresql_concurrently=True)
@@ -1,16 +1,113 @@
+from typing import Literal
+
 from pydantic import Field, EmailStr
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str = Field(..., env="DATABASE_URL")
+    # Пул соединений с БД (на каждый воркер)
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Одинаковые одновременные чтения пользователя (email/name/id) - одним запросом
+    DB_SINGLE_FLIGHT_ENABLED: bool = True
+    # Реплика для чтения (None - всё на primary). После записи ключ пользователя
+    # читается с primary DB_REPLICA_STICKY_SECONDS, после ошибки реплика
+    # не используется DB_REPLICA_RETRY_AFTER секунд
+    DATABASE_REPLICA_URL: str | None = None
+    DB_REPLICA_STICKY_SECONDS: float = 5.0
+    DB_REPLICA_RETRY_AFTER: float = 10.0
     SECRET_KEY: str = Field(default="secret", env="SECRET_KEY")
     # Добавляем email-переменные
     EMAIL_USER: EmailStr = Field(..., env="EMAIL_USER")
     EMAIL_PASSWORD: str = Field(..., env="EMAIL_PASSWORD")
     SMTP_HOST: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
+    SMTP_START_TLS: bool = True
+    SMTP_USE_TLS: bool = False
+    SMTP_TIMEOUT: int = 30
+    SMTP_POOL_SIZE: int = 4
+    # Очередь писем в Redis; воркер можно отключить на части процессов
+    EMAIL_OUTBOX_WORKER_ENABLED: bool = True
+    EMAIL_OUTBOX_BATCH_SIZE: int = 20
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 5
+    EMAIL_OUTBOX_RETRY_BASE_DELAY: float = 5.0
+    EMAIL_OUTBOX_RETRY_MAX_DELAY: float = 600.0
+    # Воркер без отметки дольше этого считается упавшим, его письма
+    # из списка "в обработке" возвращаются в очередь
+    EMAIL_OUTBOX_WORKER_TTL: int = 30
+    # Схема БД при старте воркера: check - только сверить ревизию Alembic с head,
+    # create_all - создать таблицы (локальная разработка, включается в .env), skip - ничего не делать
+    DB_STARTUP_MODE: Literal["create_all", "check", "skip"] = "check"
+    ALEMBIC_CONFIG: str = "alembic.ini"
+    # Прогрев при старте: соединения с БД (None - DB_POOL_SIZE) и Redis, процессы bcrypt, JWT
+    STARTUP_WARMUP: bool = True
+    STARTUP_WARMUP_DB_CONNECTIONS: int | None = None
+    STARTUP_WARMUP_REDIS_CONNECTIONS: int = 10
+    # /health/ready: таймаут каждой проверки, время жизни результата, проверять ли SMTP
+    HEALTH_CHECK_TIMEOUT: float = 2.0
+    HEALTH_CHECK_CACHE_TTL: float = 2.0
+    HEALTH_CHECK_SMTP: bool = False
     BASE_URL: str = "http://localhost:5173"
+    REDIS_URL: str = "redis://localhost:6379"
+    # Один пул соединений с Redis на процесс
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: int = 5
+    REDIS_CONNECT_TIMEOUT: int = 5
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    # Пул процессов для bcrypt (None - по числу доступных ядер)
+    PASSWORD_HASH_WORKERS: int | None = None
+    PASSWORD_HASH_QUEUE_SIZE: int = 64
+    PASSWORD_HASH_BUSY_STATUS_CODE: int = 503
+    PASSWORD_HASH_RETRY_AFTER: int = 1
+    # Стоимость bcrypt (подбирается: python -m app.helpers.users.password_policy)
+    # и целевое время одной проверки пароля для подбора
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_TARGET_MS: float = 250.0
+    # Массовый импорт: строк в пачке (одна проверка уникальности, один INSERT)
+    # и максимум строк на один запрос
+    USER_IMPORT_CHUNK_SIZE: int = 1000
+    USER_IMPORT_MAX_ROWS: int = 100_000
+    # Лента изменений отдаёт только записи старше стольких секунд: транзакция,
+    # начатая раньше, но ещё не закоммиченная, не окажется позади курсора
+    USER_CHANGES_SETTLE_SECONDS: float = 2.0
+    # Rate limiting: маршрут -> правила "ключ:лимит/окно_в_секундах",
+    # ключи: ip, identifier (логин из формы), email (из JSON-тела)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: dict[str, list[str]] = {
+        "login": ["ip:30/60", "identifier:5/60"],
+        "send_reset_password": ["ip:10/3600", "email:3/900"],
+        "send_confirmation_code": ["ip:10/3600", "email:3/900"],
+    }
+    # Брать IP клиента из X-Forwarded-For (только за доверенным прокси)
+    RATE_LIMIT_TRUST_FORWARDED: bool = False
+    # Коды и токены сброса пароля: время жизни, неверных попыток до блокировки,
+    # длительность блокировки и сколько живёт проверенный код до смены пароля
+    RESET_CODE_TTL: int = 180
+    RESET_CODE_MAX_ATTEMPTS: int = 5
+    RESET_CODE_LOCKOUT: int = 900
+    RESET_VERIFIED_TTL: int = 600
+    # JWT: библиотека подписи (jose, pyjwt, hmac) и кеш проверенных токенов
+    JWT_BACKEND: str = "jose"
+    JWT_VERIFIED_CACHE_SIZE: int = 10_000
+    # Отозванные токены: Redis + локальный кеш в каждом воркере
+    TOKEN_REVOCATION_CHANNEL: str = "tokens:revoked"
+    TOKEN_REVOCATION_CACHE_SIZE: int = 100_000
+    # Кеш пользователей для get_current_user
+    USER_CACHE_LOCAL_SIZE: int = 10_000
+    USER_CACHE_LOCAL_TTL: float = 30.0
+    USER_CACHE_REDIS_TTL: int = 300
+    USER_CACHE_CHANNEL: str = "users:invalidated"
+    # /resolve-code: кеш list.json
+    RESOLVE_CODE_URL: str = "https://go.abctalkwithme.com/list.json"
+    RESOLVE_CODE_API_KEYS: list[str] = ["7774268f7f844fe9b11b5eeffe7462a4"]
+    RESOLVE_CODE_CACHE_TTL: float = 60.0
+    HTTP_CLIENT_TIMEOUT: float = 10.0
 
     class Config:
         env_file = ".env"  # Загрузка переменных из файла
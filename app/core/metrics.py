@@ -0,0 +1,171 @@
+import functools
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+# Все метрики пишутся из event loop (один поток на воркер), поэтому
+# обычные dict/list без блокировок: запись - пара операций со словарём.
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: tuple[str, ...] = (),
+            buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [счётчики по корзинам (последняя - +Inf), сумма]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def time(self, *labels):
+        """Декоратор для async-функций: длительность вызова попадает в гистограмму."""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start, *(labels or (func.__name__,)))
+            return wrapper
+        return decorator
+
+    def samples(self) -> Iterable[str]:
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors: list[Callable[[], Iterable[Gauge | Counter]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), **kwargs) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, **kwargs))
+
+    def add_collector(self, collector: Callable[[], Iterable[Gauge | Counter]]):
+        """Коллектор строит метрики в момент выгрузки (например, из чужих счётчиков)."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        metrics = list(self._metrics)
+        for collector in self._collectors:
+            metrics.extend(collector())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+HTTP_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being processed"
+)
+PASSWORD_HASH_DURATION = registry.histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify time including queueing", ("operation",),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+)
+PASSWORD_HASH_REJECTED = registry.counter(
+    "password_hash_rejected_total", "bcrypt calls rejected because the pool queue was full"
+)
+SMTP_SEND_DURATION = registry.histogram(
+    "smtp_send_duration_seconds", "SMTP send time by result", ("result",)
+)
+REDIS_COMMAND_DURATION = registry.histogram(
+    "redis_command_duration_seconds", "RedisClient call latency by operation", ("operation",)
+)
+DB_QUERY_DURATION = registry.histogram(
+    "db_query_duration_seconds", "AuthCRUD query latency by operation", ("operation",)
+)
+RATE_LIMITED = registry.counter(
+    "rate_limited_total", "Requests rejected by the rate limiter", ("route",)
+)
+DB_COALESCED_QUERIES = registry.counter(
+    "db_coalesced_queries_total", "Queries saved: reads served by an identical in-flight query", ("operation",)
+)
+DB_ROUTED_READS = registry.counter(
+    "db_routed_reads_total", "AuthCRUD reads by target database", ("target",)
+)
+DB_REPLICA_FALLBACKS = registry.counter(
+    "db_replica_fallbacks_total", "Replica reads retried on the primary after a replica error"
+)
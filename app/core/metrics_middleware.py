@@ -0,0 +1,42 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import HTTP_IN_FLIGHT, HTTP_REQUEST_DURATION, HTTP_REQUESTS
+
+
+class MetricsMiddleware:
+    """Чистый ASGI-middleware: латентность, статусы и запросы в работе.
+
+    Маршрут берётся из шаблона пути (/users/{user_id}), а не из URL,
+    чтобы число рядов метрик не росло с числом пользователей.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            HTTP_REQUEST_DURATION.observe(duration, scope["method"], route_path)
+            HTTP_REQUESTS.inc(scope["method"], route_path, status_code)
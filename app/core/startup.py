@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import time
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.db.models import Base
+from app.dependencies.redis import RedisClient
+from app.helpers.users.password_hasher import password_hasher
+from app.security.security import ALGORITHM, SECRET_KEY, jwt_backend
+
+logger = logging.getLogger(__name__)
+
+
+class MigrationStateError(RuntimeError):
+    pass
+
+
+async def create_tables(engine: AsyncEngine):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+def alembic_heads(config_path: str) -> set[str]:
+    # Ревизии читаются из alembic/versions, env.py и БД не трогаются
+    return set(ScriptDirectory.from_config(Config(config_path)).get_heads())
+
+
+async def current_revisions(engine: AsyncEngine) -> set[str]:
+    async with engine.connect() as conn:
+        heads = await conn.run_sync(
+            lambda sync_conn: MigrationContext.configure(sync_conn).get_current_heads()
+        )
+    return set(heads)
+
+
+async def check_migrations(engine: AsyncEngine, config_path: str):
+    """Один SELECT из alembic_version вместо create_all по всем таблицам."""
+    expected = alembic_heads(config_path)
+    current = await current_revisions(engine)
+    if current != expected:
+        raise MigrationStateError(
+            f"Database revision {sorted(current) or 'empty'} doesn't match "
+            f"head {sorted(expected)}, run `alembic upgrade head`"
+        )
+
+
+async def prepare_schema(engine: AsyncEngine, mode: str, config_path: str):
+    if mode == "create_all":
+        await create_tables(engine)
+    elif mode == "check":
+        await check_migrations(engine, config_path)
+    elif mode != "skip":
+        raise ValueError(f"Unknown DB_STARTUP_MODE: {mode}")
+
+
+async def warm_up_db(engine: AsyncEngine, connections: int):
+    async def touch():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    # Соединения открываются параллельно и остаются в пуле
+    await asyncio.gather(*(touch() for _ in range(connections)))
+
+
+async def warm_up_redis(redis: RedisClient, connections: int):
+    await asyncio.gather(*(redis.ping() for _ in range(connections)))
+
+
+async def warm_up_crypto():
+    # По задаче на процесс: все процессы пула запущены и импортировали bcrypt
+    await password_hasher.hash_many(["warm-up-password"] * password_hasher.workers)
+    token = jwt_backend.encode({"sub": "warm-up"}, SECRET_KEY, ALGORITHM)
+    jwt_backend.decode(token, SECRET_KEY, ALGORITHM)
+
+
+async def warm_up(engine: AsyncEngine, redis: RedisClient):
+    """Прогревает пулы и криптографию до того, как воркер начнёт принимать трафик.
+    Ошибки только логируются: недоступную зависимость покажет readiness."""
+    steps = {
+        "db": warm_up_db(engine, settings.STARTUP_WARMUP_DB_CONNECTIONS or settings.DB_POOL_SIZE),
+        "redis": warm_up_redis(redis, settings.STARTUP_WARMUP_REDIS_CONNECTIONS),
+        "crypto": warm_up_crypto(),
+    }
+
+    async def run(name, step):
+        start = time.perf_counter()
+        try:
+            await step
+            logger.info("Warm-up %s finished in %.3fs", name, time.perf_counter() - start)
+        except Exception as e:
+            logger.warning("Warm-up %s failed: %s", name, e)
+
+    await asyncio.gather(*(run(name, step) for name, step in steps.items()))
@@ -1,50 +1,310 @@
 from fastapi import HTTPException
 from pydantic import EmailStr
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import delete, false, func, literal_column, null, or_, true, tuple_, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import make_transient_to_detached
 from starlette import status
 
-from app.db.models import User
-from app.helpers.users.helpers import hash_password
+from app.core.config import settings
+from app.core.metrics import DB_QUERY_DURATION, DB_COALESCED_QUERIES, DB_ROUTED_READS, DB_REPLICA_FALLBACKS
+from app.db.models import User, UserTombstone
+from app.db.clock import db_now
+from app.db.replica import replica_router
+from app.helpers.single_flight import SingleFlight
+from app.helpers.users.password_hasher import password_hasher
 from app.schemas.UserSchema import UserSchema
 
 
+def _like_escape(value: str) -> str:
+    # Пользовательский ввод в LIKE: % и _ ищутся как обычные символы.
+    # Экранирующий символ "/", а не обратный слеш: его запись в SQL не зависит
+    # от standard_conforming_strings
+    return value.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+# Колонки для списков и карточек пользователей: password не читается
+USER_PUBLIC_COLUMNS = (User.id, User.name, User.email)
+
+# Общий для всех AuthCRUD воркера: одинаковые одновременные чтения пользователя
+user_lookups = SingleFlight()
+
+
 class AuthCRUD:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, replica: AsyncSession | None = None):
         self.db = db
+        self.replica = replica
+        # После первой записи все чтения этого CRUD - с primary (read-your-writes)
+        self.wrote = False
+
+    def _use_replica(self, keys: tuple[str, ...] = ()) -> bool:
+        return self.replica is not None and not self.wrote and replica_router.available(keys)
+
+    async def _read(self, query, *keys: str):
+        """SELECT с реплики, если можно; при ошибке реплики - повтор на primary.
+        keys - ключи пользователя ("id:<id>", "email:<email>"), недавно
+        изменённые ключи читаются с primary."""
+        if self._use_replica(keys):
+            try:
+                result = await self.replica.execute(query)
+                DB_ROUTED_READS.inc("replica")
+                return result
+            except (SQLAlchemyError, OSError) as e:
+                replica_router.failed(e)
+                DB_REPLICA_FALLBACKS.inc()
+                try:
+                    await self.replica.rollback()
+                except (SQLAlchemyError, OSError):
+                    pass
+
+        DB_ROUTED_READS.inc("primary")
+        return await self.db.execute(query)
+
+    async def _load_user(self, column, value, key: str | None) -> tuple[User | None, dict | None]:
+        result = await self._read(select(User).where(column == value), *(key,) if key else ())
+        user = result.scalars().first()
+        if user is None:
+            return None, None
+        # Ожидающим - снимок колонок: сам объект привязан к сессии ведущего запроса
+        return user, {attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs}
+
+    async def _get_user_by(self, operation: str, column, value, key: str | None = None) -> User | None:
+        # С несохранёнными изменениями в сессии читаем сами: общий запрос их не увидит
+        if not settings.DB_SINGLE_FLIGHT_ENABLED or self.db.new or self.db.dirty or self.db.deleted:
+            user, _ = await self._load_user(column, value, key)
+            return user
 
-    async def _check_unique_fields(self, exclude_user_id: int = None, **kwargs):
-        query = select(User)
+        # Запрос выполняет первый пришедший в своей сессии, остальные ждут его результат.
+        # Чтения с реплики и с primary не объединяются: primary нужен ради свежих данных
+        replica = self._use_replica((key,) if key else ())
+        (user, state), shared = await user_lookups.do(
+            (self.db.bind, replica, operation, value),
+            lambda: self._load_user(column, value, key)
+        )
+        if not shared or state is None:
+            return user
+        DB_COALESCED_QUERIES.inc(operation)
+
+        # Каждый запрос получает свой объект в своей сессии, без обращения к БД
+        return await self._attach(state)
+
+    async def _attach(self, values) -> User:
+        # Значения колонок (снимок или строка RETURNING) - в объект сессии без SELECT.
+        # Если пользователь уже есть в identity map, его состояние обновится
+        user = User(**{attr.key: values[attr.key] for attr in User.__mapper__.column_attrs})
+        make_transient_to_detached(user)
+        return await self.db.merge(user, load=False)
+
+    def _insert(self):
+        # INSERT ... ON CONFLICT - из диалекта PostgreSQL (прод) или SQLite (локально)
+        dialect = self.db.get_bind().dialect.name
+        return postgresql.insert if dialect == "postgresql" else sqlite.insert
+
+    @DB_QUERY_DURATION.time()
+    async def find_taken_identities(
+            self,
+            names: list[str] | None = None,
+            emails: list[str] | None = None,
+            exclude_user_id: int | None = None
+    ) -> tuple[set[str], set[str]]:
+        """Возвращает занятые имена и email-ы одним запросом
+        WHERE name IN (...) OR email IN (...)."""
+        names = set(names or [])
+        emails = set(emails or [])
 
-        # Добавляем все условия поля=значение
-        for field, value in kwargs.items():
-            query = query.where(getattr(User, field) == value)
+        conditions = []
+        if names:
+            conditions.append(User.name.in_(names))
+        if emails:
+            conditions.append(User.email.in_(emails))
+        if not conditions:
+            return set(), set()
 
+        query = select(User.name, User.email).where(or_(*conditions))
         # Исключаем пользователя, если нужно
         if exclude_user_id:
             query = query.where(User.id != exclude_user_id)
 
-        result = await self.db.execute(query)
-        if result.scalars().first():
-            fields_str = ', '.join(f"{key}='{value}'" for key, value in kwargs.items())
+        rows = (await self._read(query)).all()
+        taken_names = {row.name for row in rows if row.name in names}
+        taken_emails = {row.email for row in rows if row.email in emails}
+        return taken_names, taken_emails
+
+    async def _check_unique_fields(self, exclude_user_id: int = None, name: str = None, email: str = None):
+        taken_names, taken_emails = await self.find_taken_identities(
+            [name] if name is not None else None,
+            [email] if email is not None else None,
+            exclude_user_id=exclude_user_id
+        )
+
+        conflicts = {}
+        if taken_names:
+            conflicts["name"] = name
+        if taken_emails:
+            conflicts["email"] = email
+        if conflicts:
+            fields_str = ', '.join(f"{key}='{value}'" for key, value in conflicts.items())
             raise HTTPException(status_code=409, detail=f"User with {fields_str} already exists")
 
-    async def get_users(self, skip: int, limit: int):
-        result = await self.db.execute(select(User).offset(skip).limit(limit))
-        return result.scalars().all()
+    # Чтение для ответов API - Core-строки только нужных колонок (dict),
+    # без ORM-объектов и identity map
+
+    @DB_QUERY_DURATION.time()
+    async def get_users(self, skip: int, limit: int) -> list[dict]:
+        result = await self._read(
+            select(*USER_PUBLIC_COLUMNS).order_by(User.id).offset(skip).limit(limit)
+        )
+        return [dict(row) for row in result.mappings()]
+
+    @DB_QUERY_DURATION.time()
+    async def get_users_after(self, after_id: int | None, limit: int) -> list[dict]:
+        # Keyset-пагинация: WHERE id > :cursor идёт по индексу первичного ключа
+        query = select(*USER_PUBLIC_COLUMNS).order_by(User.id).limit(limit)
+        if after_id is not None:
+            query = query.where(User.id > after_id)
 
+        result = await self._read(query)
+        return [dict(row) for row in result.mappings()]
+
+    @DB_QUERY_DURATION.time()
+    async def get_user_row(self, user_id: int) -> dict | None:
+        result = await self._read(select(*USER_PUBLIC_COLUMNS).where(User.id == user_id), f"id:{user_id}")
+        row = result.mappings().first()
+        return dict(row) if row is not None else None
+
+    def _sorted_lower(self, column):
+        # То же выражение, что в индексах ix_users_*_lower: в PostgreSQL COLLATE "C"
+        # даёт и LIKE 'abc%', и ORDER BY по индексу. В SQLite сравнение и так побайтовое
+        key = func.lower(column)
+        if self.db.get_bind().dialect.name == "postgresql":
+            key = key.collate("C")
+        return key
+
+    @DB_QUERY_DURATION.time()
+    async def search_users(
+            self,
+            text: str | None,
+            field: str,
+            mode: str,
+            domain: str | None,
+            after: list | None,
+            limit: int
+    ) -> list[dict]:
+        """Поиск по префиксу/подстроке name и email с фильтром по домену email.
+
+        По одному полю результат отсортирован по lower(поле), id, по обоим - по id.
+        Возвращает строки с колонками USER_PUBLIC_COLUMNS и sort_key для курсора;
+        after - ключ сортировки (sort_key, id) последней записи предыдущей страницы.
+
+        На каждое поле - своя ветка: диапазон индекса ix_users_<поле>_lower
+        (с доменом - ix_users_email_domain) в порядке (lower(поле), id) с LIMIT.
+        По обоим полям ветки сливаются по (sort_key, id): sort_key - значение
+        первого совпавшего поля, поэтому каждый пользователь встречается один раз.
+        Только домен - ветка по email."""
+        fields = (["name", "email"] if field == "any" else [field]) if text else ["email"]
+
+        branches = []
+        for i, name in enumerate(fields):
+            column = getattr(User, name)
+            sort_key = self._sorted_lower(column)
+            query = select(*USER_PUBLIC_COLUMNS, sort_key.label("sort_key"))
+            if text:
+                query = query.where(self._matches(column, text, mode))
+                # Совпавших по предыдущему полю уже вернула его ветка
+                for previous in fields[:i]:
+                    previous_column = getattr(User, previous)
+                    query = query.where(or_(
+                        previous_column.is_(None), ~self._matches(previous_column, text, mode)
+                    ))
+            if domain:
+                query = query.where(self._email_domain() == domain)
+            if after is not None:
+                query = query.where(tuple_(sort_key, User.id) > tuple_(*after))
+            branches.append(query.order_by(sort_key, User.id).limit(limit))
+
+        if len(branches) == 1:
+            query = branches[0]
+        else:
+            merged = union_all(*(select(branch.subquery()) for branch in branches)).subquery()
+            query = select(merged).order_by(merged.c.sort_key, merged.c.id).limit(limit)
+
+        result = await self._read(query)
+        return [dict(row) for row in result.mappings()]
+
+    def _matches(self, column, text: str, mode: str):
+        if mode == "prefix":
+            return self._sorted_lower(column).like(_like_escape(text) + "%", escape="/")
+        # Подстрока - по триграммным индексам ix_users_*_trgm
+        return func.lower(column).like("%" + _like_escape(text) + "%", escape="/")
+
+    def _email_domain(self):
+        # То же выражение, что в индексе ix_users_email_domain
+        email = func.lower(User.email)
+        if self.db.get_bind().dialect.name == "postgresql":
+            # Константы - литералами: с параметрами выражение не совпадёт с индексом
+            return func.split_part(email, literal_column("'@'"), literal_column("2"))
+        return func.substr(email, func.instr(email, "@") + 1)
+
+    @DB_QUERY_DURATION.time()
+    async def get_changes(self, after: tuple | None, settle_seconds: float, limit: int) -> list[dict]:
+        """Лента изменений: живые пользователи по updated_at и надгробия по deleted_at,
+        в порядке (changed_at, id, deleted). after - (changed_at, id, deleted)
+        последней записи предыдущей страницы. Записи моложе settle_seconds
+        (по часам БД) не отдаются.
+
+        Каждая ветка - диапазон своего индекса (ix_users_updated_at,
+        ix_user_tombstones_deleted_at) с LIMIT, общий порядок - слиянием двух веток."""
+        until = db_now(settle_seconds)
+        users_key = tuple_(User.updated_at, User.id)
+        tombstones_key = tuple_(UserTombstone.deleted_at, UserTombstone.id)
+
+        live = (
+            select(
+                User.id, User.name, User.email,
+                User.updated_at.label("changed_at"), false().label("deleted")
+            )
+            .where(User.updated_at <= until)
+            .order_by(User.updated_at, User.id)
+            .limit(limit)
+        )
+        deleted = (
+            select(
+                UserTombstone.id, null().label("name"), null().label("email"),
+                UserTombstone.deleted_at.label("changed_at"), true().label("deleted")
+            )
+            .where(UserTombstone.deleted_at <= until)
+            .order_by(UserTombstone.deleted_at, UserTombstone.id)
+            .limit(limit)
+        )
+        if after is not None:
+            changed_at, user_id, was_deleted = after
+            live = live.where(users_key > (changed_at, user_id))
+            # При равных (changed_at, id) надгробие идёт после живой записи
+            deleted = deleted.where(
+                tombstones_key > (changed_at, user_id) if was_deleted else tombstones_key >= (changed_at, user_id)
+            )
+
+        feed = union_all(select(live.subquery()), select(deleted.subquery())).subquery()
+        # Лента читается только с primary: с отстающей реплики курсор мог бы
+        # уйти дальше изменений, которые она ещё не получила
+        result = await self.db.execute(
+            select(feed).order_by(feed.c.changed_at, feed.c.id, feed.c.deleted).limit(limit)
+        )
+        return [{**row, "deleted": bool(row["deleted"])} for row in result.mappings()]
+
+    @DB_QUERY_DURATION.time()
     async def get_user_by_email(self, email: EmailStr) -> User:
-        result = await self.db.execute(select(User).where(User.email == email))
-        return result.scalars().first()
+        return await self._get_user_by("get_user_by_email", User.email, email, f"email:{email}")
 
+    @DB_QUERY_DURATION.time()
     async def get_user_by_name(self, name: str):
-        result = await self.db.execute(select(User).where(User.name == name))
-        return result.scalars().first()
+        return await self._get_user_by("get_user_by_name", User.name, name)
 
+    @DB_QUERY_DURATION.time()
     async def get_user_by_id(self, user_id: int):
-        result = await self.db.execute(select(User).where(User.id == user_id))
-        user = result.scalars().first()
+        user = await self._get_user_by("get_user_by_id", User.id, user_id, f"id:{user_id}")
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -52,26 +312,66 @@ class AuthCRUD:
             )
         return user
 
-    async def update_user_fields(self, user: User, **fields_to_update):
-        # Проверяем: не обновляем ли мы поля на те же самые значения
-        same_fields = [
-            field for field, value in fields_to_update.items()
-            if getattr(user, field) == value
-        ]
-        if same_fields:
-            fields_str = ', '.join(same_fields)
-            raise HTTPException(status_code=409, detail=f"New values for {fields_str} match the current ones")
-
-        # Проверка на уникальность
-        await self._check_unique_fields(exclude_user_id=user.id, **fields_to_update)
-
-        # Обновляем поля
-        for field, value in fields_to_update.items():
-            setattr(user, field, value)
-        
-        return user
+    async def update_user(self, user_id: int, fields: dict, password: str | None = None) -> tuple[User, str]:
+        """Меняет name/email (fields) и пароль. Возвращает пользователя и прежний email."""
+        hashed_password = await password_hasher.hash(password) if password is not None else None
+        return await self._update_user(user_id, fields, hashed_password)
+
+    @DB_QUERY_DURATION.time("update_user")
+    async def _update_user(self, user_id: int, fields: dict, hashed_password: str | None) -> tuple[User, str]:
+        self.wrote = True
+        # Один запрос UPDATE ... RETURNING. Прежний email - из CTE: она видит
+        # строку до изменения. Условие != отсекает обновление на те же значения
+        users = User.__table__
+        old = (
+            select(users.c.id, users.c.email)
+            .where(users.c.id == user_id)
+            .with_for_update()
+            .cte("old")
+        )
+        values = dict(fields)
+        if hashed_password is not None:
+            values["password"] = hashed_password
+
+        query = (
+            update(users)
+            .where(users.c.id == old.c.id)
+            .where(*(users.c[field] != value for field, value in fields.items()))
+            .values(**values)
+            .returning(*users.c, old.c.email.label("old_email"))
+        )
+
+        try:
+            row = (await self.db.execute(query)).first()
+            await self.db.commit()
+        except IntegrityError as e:
+            await self.db.rollback()
+            # Дополнительный запрос только на пути ошибки: какое поле занято
+            await self._check_unique_fields(exclude_user_id=user_id, **fields)
+            raise HTTPException(
+                status_code=409,
+                detail=f"Data conflict occurred: {e}"
+            )
+
+        if row is None:
+            await self._raise_not_updated(user_id, fields)
+        return await self._attach(row._mapping), row.old_email
+
+    async def _raise_not_updated(self, user_id: int, fields: dict):
+        result = await self.db.execute(select(User.name, User.email).where(User.id == user_id))
+        current = result.first()
+        if current is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+
+        same_fields = [field for field, value in fields.items() if current._mapping[field] == value]
+        fields_str = ', '.join(same_fields)
+        raise HTTPException(status_code=409, detail=f"New values for {fields_str} match the current ones")
 
     async def update_user_name(self, db_user: User, name: str) -> User:
+        self.wrote = True
 
         if name != db_user.name:
             name_result = await self.db.execute(
@@ -93,6 +393,7 @@ class AuthCRUD:
         )
 
     async def update_user_email(self, db_user: User, email: EmailStr) -> User:
+        self.wrote = True
         if email != db_user.email:
             email_result = await self.db.execute(
                 select(User).where(
@@ -112,60 +413,118 @@ class AuthCRUD:
             detail=f"Your email already set to {db_user.email}"
         )
 
-    async def update_user_password(self, db_user: User, new_password: str) -> User:
-        if not db_user:
+    async def update_user_password(self, email: EmailStr, new_password: str) -> User:
+        hashed_password = await password_hasher.hash(new_password)
+        return await self._update_user_password(email, hashed_password)
+
+    @DB_QUERY_DURATION.time("update_user_password")
+    async def _update_user_password(self, email: EmailStr, hashed_password: str) -> User:
+        self.wrote = True
+        users = User.__table__
+        query = (
+            update(users)
+            .where(users.c.email == email)
+            .values(password=hashed_password)
+            .returning(*users.c)
+        )
+        row = (await self.db.execute(query)).first()
+        await self.db.commit()
+
+        if row is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
+        return await self._attach(row._mapping)
 
-        if new_password != db_user.password:
-            db_user.password = hash_password(new_password)
-            return db_user
-
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="You can't change the password to the one you have"
+    @DB_QUERY_DURATION.time()
+    async def replace_password_hash(self, user_id: int, old_hash: str, new_hash: str) -> bool:
+        self.wrote = True
+        # Compare-and-set: если пароль успели сменить, новый не затираем
+        users = User.__table__
+        result = await self.db.execute(
+            update(users)
+            .where(users.c.id == user_id, users.c.password == old_hash)
+            .values(password=new_hash)
         )
+        await self.db.commit()
+        return result.rowcount == 1
+
+    async def create_user(self, userdata: UserSchema) -> User | None:
+        """None - имя или email уже заняты."""
+        hashed_password = await password_hasher.hash(userdata.password)
+        return await self._insert_user(userdata, hashed_password)
 
-    async def save_user_in_db(self, user: User) -> User:
+    @DB_QUERY_DURATION.time("create_user")
+    async def _insert_user(self, userdata: UserSchema, hashed_password: str) -> User | None:
+        self.wrote = True
+        # ON CONFLICT DO NOTHING: конфликт - пустой RETURNING, а не ошибка и откат
+        query = (
+            self._insert()(User.__table__)
+            .values(name=userdata.name, email=userdata.email, password=hashed_password)
+            .on_conflict_do_nothing()
+            .returning(*User.__table__.c)
+        )
         try:
+            row = (await self.db.execute(query)).first()
             await self.db.commit()
-            await self.db.refresh(user)
-            return user
-        except IntegrityError as e:
+        except Exception as e:
             await self.db.rollback()
             raise HTTPException(
-                status_code=409,
-                detail=f"Data conflict occurred: {e}"
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Internal server error: {e}"
             )
+        return await self._attach(row._mapping) if row is not None else None
+
+    @DB_QUERY_DURATION.time()
+    async def insert_users(self, rows: list[dict]) -> list:
+        """Многострочный INSERT ... ON CONFLICT DO NOTHING RETURNING id, name, email.
+        Строки, которые успел занять параллельный запрос, просто не вернутся."""
+        self.wrote = True
+        if not rows:
+            return []
+
+        query = (
+            self._insert()(User)
+            .values(rows)
+            .on_conflict_do_nothing()
+            .returning(User.id, User.name, User.email)
+        )
 
-    async def create_user(self, userdata: UserSchema) -> UserSchema:
         try:
-            new_user = User(
-                name=userdata.name,
-                email=userdata.email,
-                password=hash_password(userdata.password)
-            )
-            self.db.add(new_user)
+            inserted = (await self.db.execute(query)).all()
             await self.db.commit()
-            await self.db.refresh(new_user)
-
-            return new_user
         except Exception as e:
+            await self.db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Internal server error: {e}"
             )
+        return inserted
 
-    async def delete_user(self, user: User) -> User:
-
-        await self.db.delete(user)
+    @DB_QUERY_DURATION.time()
+    async def delete_user(self, user_id: int) -> User:
+        self.wrote = True
+        users = User.__table__
+        query = delete(users).where(users.c.id == user_id).returning(*users.c)
 
         try:
+            row = (await self.db.execute(query)).first()
+            if row is not None:
+                # Надгробие для ленты изменений - в той же транзакции, что и DELETE
+                await self.db.execute(
+                    self._insert()(UserTombstone)
+                    .values(id=row.id)
+                    .on_conflict_do_update(index_elements=["id"], set_={"deleted_at": db_now()})
+                )
             await self.db.commit()
         except Exception as e:
             await self.db.rollback()
             raise HTTPException(status_code=500, detail=str(e))
 
-        return user
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        return User(**row._mapping)
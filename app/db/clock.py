@@ -0,0 +1,40 @@
+from sqlalchemy import DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+
+class db_now(FunctionElement):
+    """Текущее время по часам БД, минус offset секунд.
+
+    Одни часы для всех хостов приложения: от расхождения их часов
+    порядок updated_at / deleted_at не зависит. В PostgreSQL -
+    clock_timestamp() (время записи, а не начала транзакции), в SQLite -
+    строка в том же формате, в каком SQLAlchemy пишет DateTime, иначе
+    сравнение с курсором шло бы по строкам разного вида.
+    """
+    type = DateTime(timezone=True)
+    inherit_cache = True
+    # offset попадает в SQL литералом, поэтому должен входить в ключ кеша
+    # компиляции, иначе db_now(2) и db_now(50) получат один и тот же SQL
+    _traverse_internals = FunctionElement._traverse_internals + [
+        ("offset", InternalTraversal.dp_plain_obj)
+    ]
+
+    def __init__(self, offset: float = 0.0):
+        self.offset = float(offset)
+        super().__init__()
+
+
+@compiles(db_now)
+def _db_now_default(element, compiler, **kw):
+    if element.offset:
+        return f"(clock_timestamp() - make_interval(secs => {element.offset!r}))"
+    return "clock_timestamp()"
+
+
+@compiles(db_now, "sqlite")
+def _db_now_sqlite(element, compiler, **kw):
+    if element.offset:
+        return f"strftime('%Y-%m-%d %H:%M:%f000', 'now', '-{element.offset!r} seconds')"
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
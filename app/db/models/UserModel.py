@@ -1,12 +1,21 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, DateTime, Index, Integer, String, func
 
+from app.db.clock import db_now
 from . import Base
 
 
 class User(Base):
     __tablename__ = "users"
+    # Лента изменений: WHERE (updated_at, id) > курсор ORDER BY updated_at, id
+    __table_args__ = (Index("ix_users_updated_at", "updated_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String, unique=True)
     email = Column(String, unique=True)
     password = Column(String)
+    # Время по часам БД (db_now) - и для Core INSERT/UPDATE, если updated_at не задан явно.
+    # server_default - для строк, вставленных мимо приложения
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False,
+        default=db_now(), onupdate=db_now(), server_default=func.now()
+    )
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, DateTime, Index, Integer, func
+
+from app.db.clock import db_now
+from . import Base
+
+
+class UserTombstone(Base):
+    """Удалённые пользователи - для ленты изменений (строки в users уже нет)."""
+    __tablename__ = "user_tombstones"
+    __table_args__ = (Index("ix_user_tombstones_deleted_at", "deleted_at", "id"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, default=db_now(), server_default=func.now())
@@ -3,5 +3,6 @@ from sqlalchemy.ext.declarative import declarative_base
 Base = declarative_base()
 
 from .UserModel import User
+from .UserTombstoneModel import UserTombstone
 
-__all__ = ['Base', 'User']
+__all__ = ['Base', 'User', 'UserTombstone']
@@ -0,0 +1,66 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.overflow_events = 0
+        self.timeouts = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_avg": self.wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+            "wait_seconds_max": self.wait_seconds_max,
+            "overflow_events": self.overflow_events,
+            "timeouts": self.timeouts,
+        }
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, который считает время ожидания соединения,
+    выходы за pool_size (overflow) и таймауты."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self):
+        # Все обращения к пулу идут из event loop, поэтому счётчики без блокировок
+        overflow_before = self._overflow
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+
+        waited = time.perf_counter() - start
+        self.stats.checkouts += 1
+        self.stats.wait_seconds_total += waited
+        self.stats.wait_seconds_max = max(self.stats.wait_seconds_max, waited)
+        if self._overflow > overflow_before and self._overflow > 0:
+            self.stats.overflow_events += 1
+        return connection
+
+    def recreate(self):
+        # После engine.dispose() статистика продолжает накапливаться
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def status_dict(self) -> dict:
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            **self.stats.as_dict(),
+        }
@@ -0,0 +1,51 @@
+import logging
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaRouter:
+    """Решает, можно ли читать с реплики.
+
+    Не с реплики читаются ключи, которые недавно менялись (реплика могла
+    ещё не догнать primary), и всё, пока реплика после ошибки на паузе.
+    Ключи - как в кеше пользователей: "id:<id>", "email:<email>".
+    """
+
+    def __init__(self, sticky_seconds: float, retry_after: float, max_pins: int = 10_000):
+        self.sticky_seconds = sticky_seconds
+        self.retry_after = retry_after
+        self.max_pins = max_pins
+        self._pins: dict[str, float] = {}
+        self._down_until = 0.0
+
+    def pin(self, keys: list[str]):
+        now = time.monotonic()
+        if len(self._pins) >= self.max_pins:
+            self._pins = {key: until for key, until in self._pins.items() if until > now}
+        for key in keys:
+            self._pins[key] = now + self.sticky_seconds
+
+    def available(self, keys: tuple[str, ...] = ()) -> bool:
+        now = time.monotonic()
+        if self._down_until > now:
+            return False
+        for key in keys:
+            until = self._pins.get(key)
+            if until is not None:
+                if until > now:
+                    return False
+                del self._pins[key]
+        return True
+
+    def failed(self, error: Exception):
+        logger.warning("Replica read failed, using primary for %.0fs: %s", self.retry_after, error)
+        self._down_until = time.monotonic() + self.retry_after
+
+
+replica_router = ReplicaRouter(
+    sticky_seconds=settings.DB_REPLICA_STICKY_SECONDS,
+    retry_after=settings.DB_REPLICA_RETRY_AFTER
+)
@@ -1,19 +1,106 @@
-import os
-
-from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+from app.core.config import settings
+from app.core.metrics import Gauge, registry
+from app.db.pool import InstrumentedAsyncQueuePool
+
+
+def engine_options(database_url: str) -> dict:
+    url = make_url(database_url)
+    options = {
+        "echo": settings.DB_ECHO,  # Логгирование SQL-запросов (для разработки)
+        "future": True,  # Для SQLAlchemy 2.0+
+    }
+
+    # SQLite (локальные проверки, бенчмарки) - пул по умолчанию
+    if url.get_backend_name() == "sqlite":
+        return options
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    if url.get_driver_name() == "asyncpg":
+        # Кеш подготовленных выражений: asyncpg и адаптер SQLAlchemy
+        options["connect_args"] = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
 
-engine = create_async_engine(DATABASE_URL,
-                             echo=True,  # Логгирование SQL-запросов (для разработки)
-                             future=True,  # Для SQLAlchemy 2.0+
-                             )
+engine = create_async_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Реплика только для чтения: свой пул с теми же настройками
+replica_engine = (
+    create_async_engine(settings.DATABASE_REPLICA_URL, **engine_options(settings.DATABASE_REPLICA_URL))
+    if settings.DATABASE_REPLICA_URL else None
+)
+ReplicaSessionLocal = (
+    sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+    if replica_engine is not None else None
+)
+
+
+def _pools() -> dict:
+    pools = {"primary": engine.sync_engine.pool}
+    if replica_engine is not None:
+        pools["replica"] = replica_engine.sync_engine.pool
+    return pools
+
+
+def _status(pool) -> dict:
+    if isinstance(pool, InstrumentedAsyncQueuePool):
+        return pool.status_dict()
+    return {"pool": pool.status()}
+
+
+def pool_status() -> dict:
+    # Поля основного пула - на верхнем уровне, пул реплики (если есть) - в "replica"
+    pools = _pools()
+    status = _status(pools.pop("primary"))
+    for name, pool in pools.items():
+        status[name] = _status(pool)
+    return status
+
+
+def _collect_pool_metrics():
+    pools = {
+        name: pool.status_dict() for name, pool in _pools().items()
+        if isinstance(pool, InstrumentedAsyncQueuePool)
+    }
+    if not pools:
+        return []
+
+    metrics = []
+    for key in ("checked_out", "checked_in", "overflow", "checkouts", "wait_seconds_total",
+                "wait_seconds_max", "overflow_events", "timeouts"):
+        gauge = Gauge(f"db_pool_{key}", f"SQLAlchemy pool {key.replace('_', ' ')}", ("pool",))
+        for name, status in pools.items():
+            gauge.set(status[key], name)
+        metrics.append(gauge)
+    return metrics
+
+
+registry.add_collector(_collect_pool_metrics)
+
 
 async def get_async_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_replica_db():
+    # Без DATABASE_REPLICA_URL - None, чтения идут через основную сессию
+    if ReplicaSessionLocal is None:
+        yield None
+        return
+    async with ReplicaSessionLocal() as session:
+        yield session
@@ -1,9 +1,16 @@
 from fastapi import Depends
 
 from app.db.session import get_async_db
-from app.dependencies.getters import get_email_service, get_auth_service, get_user_service
+from app.dependencies.getters import get_email_service, get_auth_service, get_user_service, \
+    get_user_import_service, rate_limited
 
 DatabaseDependency = Depends(get_async_db)
 EmailServiceDependency = Depends(get_email_service)
 AuthServiceDependency = Depends(get_auth_service)
 UserServiceDependency = Depends(get_user_service)
+UserImportServiceDependency = Depends(get_user_import_service)
+
+
+def RateLimitDependency(route: str):
+    # Ставится в dependencies=[...] маршрута: выполняется раньше обработчика
+    return Depends(rate_limited(route))
@@ -1,33 +1,69 @@
-from fastapi import Depends
+from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.auth.read import AuthCRUD
-from app.db.session import get_async_db
+from app.db.session import get_async_db, get_replica_db
 from app.dependencies.redis import RedisClient
+from app.security.one_time_codes import reset_code_store
+from app.security.rate_limit import rate_limiter
 from app.services.auth_service import AuthService
+from app.services.email_outbox import EmailOutbox
 from app.services.email_service import EmailService
+from app.services.user_cache import UserCache, user_cache
+from app.services.user_import_service import UserImportService
 from app.services.user_service import UserService
 
 
-async def get_email_service() -> EmailService:
-    return EmailService()
+async def get_email_service(request: Request) -> EmailService:
+    # Сервис держит пул SMTP-соединений, поэтому он один на процесс
+    return request.app.state.email_service
 
 
-async def get_redis_client() -> RedisClient:
-    return RedisClient()
+async def get_redis_client(request: Request) -> RedisClient:
+    # Клиент с общим пулом создаётся один раз в lifespan приложения
+    return request.app.state.redis
+
+
+async def get_user_cache() -> UserCache:
+    return user_cache
+
+
+async def get_email_outbox(
+        redis: RedisClient = Depends(get_redis_client)
+) -> EmailOutbox:
+    return EmailOutbox(redis)
 
 
 async def get_auth_service(
         redis: RedisClient = Depends(get_redis_client),
-        email_service: EmailService = Depends(get_email_service),
-        db: AsyncSession = Depends(get_async_db)
+        email_outbox: EmailOutbox = Depends(get_email_outbox),
+        cache: UserCache = Depends(get_user_cache),
+        db: AsyncSession = Depends(get_async_db),
+        replica: AsyncSession | None = Depends(get_replica_db)
 ) -> AuthService:
-    auth_crud = AuthCRUD(db)
-    return AuthService(redis, email_service, auth_crud)
+    auth_crud = AuthCRUD(db, replica)
+    return AuthService(reset_code_store(redis), email_outbox, auth_crud, cache)
 
 
 async def get_user_service(
-        db: AsyncSession = Depends(get_async_db)
+        cache: UserCache = Depends(get_user_cache),
+        db: AsyncSession = Depends(get_async_db),
+        replica: AsyncSession | None = Depends(get_replica_db)
 ) -> UserService:
-    auth_crud = AuthCRUD(db)
-    return UserService(auth_crud)
+    auth_crud = AuthCRUD(db, replica)
+    return UserService(auth_crud, cache)
+
+
+async def get_user_import_service(
+        db: AsyncSession = Depends(get_async_db)
+) -> UserImportService:
+    return UserImportService(AuthCRUD(db))
+
+
+def rate_limited(route: str):
+    async def check_rate_limit(
+            request: Request,
+            redis: RedisClient = Depends(get_redis_client)
+    ):
+        await rate_limiter.check(route, request, redis)
+    return check_rate_limit
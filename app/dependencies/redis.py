@@ -1,15 +1,148 @@
-from redis.asyncio import Redis
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from app.core.config import settings
+from app.core.metrics import REDIS_COMMAND_DURATION
+
+logger = logging.getLogger(__name__)
+
+
+def create_redis_pool() -> BlockingConnectionPool:
+    # Когда все соединения заняты, ждём освободившееся не дольше REDIS_POOL_TIMEOUT
+    return BlockingConnectionPool.from_url(
+        settings.REDIS_URL,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL
+    )
 
 
 class RedisClient:
-    def __init__(self):
-        self.client = Redis.from_url("redis://localhost:6379")
+    def __init__(self, pool: BlockingConnectionPool):
+        self.client = Redis(connection_pool=pool)
+        # Lua-скрипты: текст -> Script (EVALSHA, при NOSCRIPT - загрузка и повтор)
+        self._scripts = {}
+
+    @REDIS_COMMAND_DURATION.time()
+    async def ping(self):
+        return await self.client.ping()
 
+    @REDIS_COMMAND_DURATION.time()
     async def setex(self, key: str, ttl: int, value: str):
         return await self.client.setex(key, ttl, value)
 
+    @REDIS_COMMAND_DURATION.time()
     async def get(self, key: str):
         return await self.client.get(key)
 
+    @REDIS_COMMAND_DURATION.time()
+    async def exists(self, key: str) -> int:
+        return await self.client.exists(key)
+
+    @REDIS_COMMAND_DURATION.time()
     async def delete(self, key: str):
         return await self.client.delete(key)
+
+    @REDIS_COMMAND_DURATION.time()
+    async def publish(self, channel: str, message: str):
+        return await self.client.publish(channel, message)
+
+    @REDIS_COMMAND_DURATION.time()
+    async def scan_keys(self, pattern: str) -> list[bytes]:
+        return [key async for key in self.client.scan_iter(match=pattern, count=1000)]
+
+    @REDIS_COMMAND_DURATION.time()
+    async def mget(self, keys: list[str | bytes]) -> list:
+        if not keys:
+            return []
+        return await self.client.mget(keys)
+
+    @REDIS_COMMAND_DURATION.time()
+    async def lpush(self, key: str, *values: str | bytes):
+        return await self.client.lpush(key, *values)
+
+    @REDIS_COMMAND_DURATION.time()
+    async def rpush(self, key: str, *values: str | bytes):
+        return await self.client.rpush(key, *values)
+
+    async def blmove(self, source: str, destination: str, timeout: int):
+        # Хвост source -> голова destination; элемент не пропадает между списками
+        return await self.client.blmove(source, destination, timeout, "RIGHT", "LEFT")
+
+    @REDIS_COMMAND_DURATION.time()
+    async def lmove(self, source: str, destination: str, count: int = 1) -> list:
+        async with self.pipeline(transaction=False) as pipe:
+            for _ in range(count):
+                pipe.lmove(source, destination, "RIGHT", "LEFT")
+            return [value for value in await pipe.execute() if value is not None]
+
+    @REDIS_COMMAND_DURATION.time()
+    async def set(self, key: str, value: str, ttl: int):
+        return await self.client.set(key, value, ex=ttl)
+
+    @REDIS_COMMAND_DURATION.time()
+    async def lrem(self, key: str, value: str | bytes, count: int = 1):
+        return await self.client.lrem(key, count, value)
+
+    @REDIS_COMMAND_DURATION.time()
+    async def zadd(self, key: str, mapping: dict):
+        return await self.client.zadd(key, mapping)
+
+    @REDIS_COMMAND_DURATION.time()
+    async def zrangebyscore(self, key: str, min_score: float, max_score: float, limit: int):
+        return await self.client.zrangebyscore(key, min_score, max_score, start=0, num=limit)
+
+    def pipeline(self, transaction: bool = True):
+        return self.client.pipeline(transaction=transaction)
+
+    @REDIS_COMMAND_DURATION.time()
+    async def setex_and_publish(self, key: str, ttl: int, value: str, channel: str, message: str):
+        async with self.pipeline() as pipe:
+            pipe.setex(key, ttl, value)
+            pipe.publish(channel, message)
+            return await pipe.execute()
+
+    @REDIS_COMMAND_DURATION.time()
+    async def eval_script(self, script: str, keys: list[str], args: list):
+        registered = self._scripts.get(script)
+        if registered is None:
+            registered = self._scripts[script] = self.client.register_script(script)
+        return await registered(keys=keys, args=args)
+
+    async def listen(
+            self,
+            channel: str,
+            handler: Callable[[bytes], None],
+            on_subscribe: Callable[[], Awaitable[None]] | None = None,
+            reconnect_delay: float = 1.0
+    ):
+        """Слушает канал pub/sub до отмены задачи, переподключаясь при ошибках.
+
+        on_subscribe вызывается после каждой (пере)подписки, чтобы подписчик
+        мог догрузить то, что пропустил, пока был отключён.
+        """
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(channel)
+                if on_subscribe is not None:
+                    await on_subscribe()
+
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        handler(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Redis subscription to %s failed: %s", channel, e)
+                await asyncio.sleep(reconnect_delay)
+            finally:
+                await pubsub.aclose()
+
+    async def close(self):
+        await self.client.aclose()
+        await self.client.connection_pool.aclose()
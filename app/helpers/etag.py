@@ -0,0 +1,37 @@
+import hashlib
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette import status
+
+from app.helpers.fast_json import FastJSONResponse, dumps
+
+
+def make_etag(data: bytes | str) -> str:
+    if isinstance(data, str):
+        data = data.encode()
+    return '"' + hashlib.blake2b(data, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    # If-None-Match сравнивает слабо: W/"x" совпадает с "x"
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified(etag: str, headers: dict | None = None) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, **(headers or {})})
+
+
+def conditional_json(request: Request, content: Any, headers: dict | None = None) -> Response:
+    """JSON-ответ с ETag по содержимому; при совпадении If-None-Match - 304 без тела."""
+    body = dumps(content)
+    etag = make_etag(body)
+    if etag_matches(request, etag):
+        return not_modified(etag, headers)
+    return Response(body, media_type=FastJSONResponse.media_type, headers={"ETag": etag, **(headers or {})})
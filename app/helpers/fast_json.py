@@ -0,0 +1,21 @@
+from typing import Any
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Сериализатор выбирается один раз при импорте: orjson, если установлен,
+# иначе собранный заранее сериализатор pydantic-core. На вход - готовые
+# dict/list из Core-запросов, построчной валидации через модели нет
+dumps = orjson.dumps if orjson is not None else TypeAdapter(Any).dump_json
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,27 @@
+import base64
+import json
+
+from fastapi import HTTPException
+from starlette import status
+
+
+def encode_cursor(*values) -> str:
+    """Упаковывает значения ключа сортировки в непрозрачный курсор."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Распаковывает курсор, созданный encode_cursor, и проверяет его формат."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        values = None
+
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return values
@@ -0,0 +1,49 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Одинаковые одновременные вызовы (по ключу) ждут один общий вызов.
+    Кеша нет: после завершения следующий вызов снова идёт в источник."""
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Возвращает (результат, shared): shared=True - результат чужого вызова.
+
+        Ведущий выполняет func в своём контексте (например, в своей сессии БД),
+        остальные ждут его future. Если ведущего отменили, ожидающие
+        выполняют func сами."""
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                return await func(), False
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Помечаем исключение полученным, даже если ожидающих нет
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
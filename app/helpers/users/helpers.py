@@ -1,13 +1,25 @@
 from passlib.context import CryptContext
 
-# Настраиваем контекст хеширования (рекомендуется bcrypt)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.config import settings
 
+# Настраиваем контекст хеширования (рекомендуется bcrypt).
+# Хеши с другой стоимостью считаются устаревшими и перехешируются при входе
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS
+)
 
-# Хелпер-функции (синхронные, но быстрые)
+
+# Хелпер-функции (синхронные и тяжёлые для CPU - из async-кода вызывать через password_hasher)
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    # Второй элемент - новый хеш, если пароль верный, а хеш устарел по политике
+    return pwd_context.verify_and_update(plain_password, hashed_password)
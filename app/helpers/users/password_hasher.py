@@ -0,0 +1,118 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_REJECTED, Gauge, registry
+from app.helpers.users.helpers import hash_password, verify_password, verify_and_update_password
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class PasswordHasher:
+    """Выполняет bcrypt в пуле процессов, чтобы не блокировать event loop."""
+
+    def __init__(
+            self,
+            workers: int | None = None,
+            queue_size: int = 64,
+            busy_status_code: int = 503,
+            retry_after: int = 1
+    ):
+        self.workers = workers or available_cpus()
+        # Одновременно: по задаче на каждый процесс + ограниченная очередь
+        self.max_pending = self.workers + queue_size
+        self.busy_status_code = busy_status_code
+        self.retry_after = retry_after
+        self.pending = 0
+        self._executor: ProcessPoolExecutor | None = None
+
+    def start(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _busy(self) -> HTTPException:
+        return HTTPException(
+            status_code=self.busy_status_code,
+            detail="Server is busy, try again later",
+            headers={"Retry-After": str(self.retry_after)}
+        )
+
+    async def _run(self, operation: str, func, *args, admit: bool = True):
+        # Счётчик меняется только в event loop, блокировки не нужны
+        if admit and self.pending >= self.max_pending:
+            PASSWORD_HASH_REJECTED.inc()
+            raise self._busy()
+
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.start(), func, *args)
+        except BrokenProcessPool:
+            # Процесс пула упал - пересоздадим пул при следующем вызове
+            self.shutdown()
+            raise self._busy()
+        finally:
+            self.pending -= 1
+            PASSWORD_HASH_DURATION.observe(time.perf_counter() - start, operation)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        # Новый хеш считается в том же процессе пула, только если старый устарел
+        return await self._run("verify", verify_and_update_password, plain_password, hashed_password)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """Хеширует пачку паролей на всех ядрах пула.
+
+        В пуле одновременно не больше workers задач пачки, поэтому логин,
+        пришедший во время импорта, ждёт максимум один bcrypt, а не всю пачку.
+        Лимит очереди к пачке не применяется - она ждёт, а не получает 503."""
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def hash_one(password: str) -> str:
+            async with semaphore:
+                return await self._run("hash_many", hash_password, password, admit=False)
+
+        return list(await asyncio.gather(*(hash_one(password) for password in passwords)))
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+    busy_status_code=settings.PASSWORD_HASH_BUSY_STATUS_CODE,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER
+)
+
+
+def _collect_metrics():
+    pending = Gauge("password_hash_pending", "bcrypt calls running or queued in the process pool")
+    pending.set(password_hasher.pending)
+    return [pending]
+
+
+registry.add_collector(_collect_metrics)
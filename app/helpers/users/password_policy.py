@@ -0,0 +1,66 @@
+"""Подбор стоимости bcrypt под целевое время проверки пароля на этом железе.
+
+    python -m app.helpers.users.password_policy [--target-ms 250]
+
+Результат - строка PASSWORD_BCRYPT_ROUNDS=N для .env. Уже сохранённые хеши
+с другой стоимостью перехешируются при следующем успешном входе.
+"""
+import argparse
+import time
+
+from passlib.hash import bcrypt
+
+from app.core.config import settings
+
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+SAMPLE_PASSWORD = "calibration-password"
+
+
+def measure_verify(rounds: int, samples: int = 3) -> float:
+    """Лучшее из samples время одной проверки пароля, в секундах (одно ядро)."""
+    handler = bcrypt.using(rounds=rounds)
+    hashed = handler.hash(SAMPLE_PASSWORD)
+
+    best = float("inf")
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.verify(SAMPLE_PASSWORD, hashed)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def calibrate_bcrypt_rounds(
+        target_seconds: float,
+        min_rounds: int = MIN_ROUNDS,
+        max_rounds: int = MAX_ROUNDS
+) -> tuple[int, dict[int, float]]:
+    """Наибольшая стоимость, при которой проверка укладывается в target_seconds,
+    но не ниже min_rounds. Каждый +1 к rounds удваивает время, поэтому
+    замеры идут снизу вверх и прекращаются на первом превышении."""
+    timings = {}
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        timings[rounds] = measure_verify(rounds)
+        if timings[rounds] > target_seconds:
+            break
+        chosen = rounds
+    return chosen, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=settings.PASSWORD_HASH_TARGET_MS)
+    parser.add_argument("--min-rounds", type=int, default=MIN_ROUNDS)
+    parser.add_argument("--max-rounds", type=int, default=MAX_ROUNDS)
+    args = parser.parse_args()
+
+    rounds, timings = calibrate_bcrypt_rounds(args.target_ms / 1000, args.min_rounds, args.max_rounds)
+    for measured, seconds in timings.items():
+        marker = "  <- chosen" if measured == rounds else ""
+        print(f"rounds={measured:<3} {seconds * 1000:>9.1f} ms {1 / seconds:>8.1f} logins/s per core{marker}")
+    print(f"\nPASSWORD_BCRYPT_ROUNDS={rounds}  (current: {settings.PASSWORD_BCRYPT_ROUNDS})")
+
+
+if __name__ == "__main__":
+    main()
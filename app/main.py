@@ -1,26 +1,84 @@
+from contextlib import asynccontextmanager
+
+import httpx
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.db.models import Base
-from app.db.session import engine
+from app.core.config import settings
+from app.core.metrics_middleware import MetricsMiddleware
+from app.core.startup import prepare_schema, warm_up
+from app.db.session import engine, replica_engine
+from app.dependencies.redis import RedisClient, create_redis_pool
+from app.helpers.users.password_hasher import password_hasher
 from app.routes.router import router
-
-app = FastAPI()
+from app.security.revocation import revocation_store
+from app.services.code_list_service import CodeListCache
+from app.services.email_outbox import create_outbox_worker
+from app.services.email_service import EmailService
+from app.services.readiness_service import ReadinessChecker, db_check, redis_check, smtp_check
+from app.services.user_cache import user_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Готовность выставляется только после прогрева
+    app.state.ready = False
+    # Создание таблиц или сверка ревизии Alembic (DB_STARTUP_MODE)
+    await prepare_schema(engine, settings.DB_STARTUP_MODE, settings.ALEMBIC_CONFIG)
+    # Один пул Redis на процесс, общий для всех запросов
+    app.state.redis = RedisClient(create_redis_pool())
+    revocation_store.start(app.state.redis)
+    user_cache.start(app.state.redis)
+
+    # Общий HTTP-клиент для исходящих запросов
+    app.state.http_client = httpx.AsyncClient(timeout=settings.HTTP_CLIENT_TIMEOUT)
+    app.state.code_list = CodeListCache(
+        app.state.http_client,
+        settings.RESOLVE_CODE_URL,
+        settings.RESOLVE_CODE_CACHE_TTL
+    )
+
+    app.state.email_service = EmailService()
+    outbox_worker = None
+    if settings.EMAIL_OUTBOX_WORKER_ENABLED:
+        outbox_worker = create_outbox_worker(app.state.redis, app.state.email_service)
+        outbox_worker.start()
+
+    checks = {"db": db_check(engine), "redis": redis_check(app.state.redis)}
+    if settings.HEALTH_CHECK_SMTP:
+        checks["smtp"] = smtp_check(app.state.email_service)
+    app.state.readiness = ReadinessChecker(
+        checks,
+        timeout=settings.HEALTH_CHECK_TIMEOUT,
+        ttl=settings.HEALTH_CHECK_CACHE_TTL
+    )
+
+    if settings.STARTUP_WARMUP:
+        await warm_up(engine, app.state.redis)
+    app.state.ready = True
+
+    yield
+
+    # Балансировщик перестаёт слать трафик, пока воркер останавливается
+    app.state.ready = False
+    if outbox_worker is not None:
+        await outbox_worker.stop()
+    await app.state.email_service.close()
+    await app.state.http_client.aclose()
+    await user_cache.stop()
+    await revocation_store.stop()
+    await app.state.redis.close()
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+    password_hasher.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(router)
 
 
-async def create_tables():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-
-
-# Запускаем создание таблиц при старте
-@app.on_event("startup")
-async def startup_event():
-    await create_tables()
-
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://127.0.0.1:5173", "http://localhost:5174", "http://127.0.0.1:5174"],
@@ -28,6 +86,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/")
@@ -41,33 +100,19 @@ def ping():
 
 
 @app.get("/resolve-code/{key}")
-def get_value(key: str, api_key: str):
-    import requests
-
-    url = "https://go.abctalkwithme.com/list.json"
-    api_keys = ['7774268f7f844fe9b11b5eeffe7462a4']
-
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
-        "Accept": "application/json",
-        "Referer": "https://google.com/",
-    }
+async def get_value(key: str, api_key: str):
+    # Ключ проверяем до любых обращений к источнику
+    if api_key not in settings.RESOLVE_CODE_API_KEYS:
+        raise HTTPException(
+            status_code=403,
+            detail='Auth error'
+        )
 
     try:
+        codes = await app.state.code_list.get()
+        return codes[key]
 
-        response = requests.get(url, headers=headers)
-
-        response.raise_for_status()
-
-        if api_key not in api_keys:
-            raise HTTPException(
-                status_code=403,
-                detail='Auth error'
-            )
-
-        return response.json()[key]
-
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(
             status_code=500,
             detail='Error: ' + str(e)
@@ -1,8 +1,7 @@
-import redis.asyncio as redis
 from dotenv import load_dotenv
 from fastapi import APIRouter, Depends
 
-from app.dependencies.dependencies import AuthServiceDependency
+from app.dependencies.dependencies import AuthServiceDependency, RateLimitDependency
 from app.routes.auth.helpers import help_validate_token
 from app.routes.users.router import oauth2_scheme
 from app.schemas.ChangePasswordRequest import ChangePasswordRequest
@@ -15,16 +14,13 @@ router = APIRouter(prefix='/auth', tags=["auth"])
 
 load_dotenv()
 
-# Создание подключения к Redis
-redis_client = redis.from_url("redis://localhost:6379")
-
 
 @router.get("/validate")
 async def validate_token(token: str = Depends(oauth2_scheme)):
     return await help_validate_token(token)
 
 
-@router.post("/send-reset-password")
+@router.post("/send-reset-password", dependencies=[RateLimitDependency("send_reset_password")])
 async def send_reset_password(
         email: Email,
         auth_service: AuthService = AuthServiceDependency
@@ -48,7 +44,7 @@ async def change_password(
     return await auth_service.change_password(request)
 
 
-@router.post("/send-confirmation-code")
+@router.post("/send-confirmation-code", dependencies=[RateLimitDependency("send_confirmation_code")])
 async def send_confirmation_code(
         email: Email,
         auth_service: AuthService = AuthServiceDependency
@@ -1,4 +1,5 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -6,3 +7,14 @@ router = APIRouter(prefix="/health", tags=["health"])
 @router.get("")
 def health():
     return "OK"
+
+
+@router.get("/ready")
+async def ready(request: Request):
+    # Воркер готов после прогрева пулов и до начала остановки
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "starting"})
+
+    # БД, Redis и (опционально) SMTP; результат кешируется на HEALTH_CHECK_CACHE_TTL
+    result = await request.app.state.readiness.check()
+    return JSONResponse(status_code=200 if result["status"] == "ready" else 503, content=result)
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+
+from app.db.session import pool_status
+
+router = APIRouter(prefix="/internal", tags=["internal"], include_in_schema=False)
+
+
+@router.get("/db-pool")
+async def db_pool():
+    return pool_status()
@@ -1,9 +1,11 @@
 from fastapi import APIRouter
 
-from app.routes import users, auth, health
+from app.routes import users, auth, health, internal, metrics
 
 router = APIRouter()
 
 router.include_router(users.router)
 router.include_router(auth.router)
 router.include_router(health.router)
+router.include_router(internal.router)
+router.include_router(metrics.router)
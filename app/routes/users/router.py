@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends
+import logging
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query, Request, Response
 from fastapi import Body
 from fastapi import HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
@@ -6,15 +9,27 @@ from jose import JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.crud.auth.read import AuthCRUD
 from app.db.models import User
-from app.db.session import get_async_db
-from app.dependencies.dependencies import UserServiceDependency
-from app.helpers.users.helpers import verify_password
-from app.schemas.UserSchema import UserSchema, UserUpdateSchema
+from app.db.session import get_async_db, get_replica_db
+from app.dependencies.dependencies import UserServiceDependency, UserImportServiceDependency, RateLimitDependency
+from app.helpers.etag import conditional_json, etag_matches, make_etag, not_modified
+from app.helpers.fast_json import FastJSONResponse
+from app.helpers.users.password_hasher import password_hasher
+from app.schemas.AvailabilityRequest import AvailabilityRequest
+from app.schemas.AvailabilityResponse import AvailabilityResponse
+from app.schemas.UserChangePage import UserChangePage
+from app.schemas.UserImportReport import UserImportReport
+from app.schemas.UserPage import UserPage
+from app.schemas.UserSchema import UserSchema, UserUpdateSchema, UserPublicSchema
 from app.schemas.oauth2_scheme import oauth2_scheme
-from app.security.security import decode_token, create_access_token, create_refresh_token, token_blacklist
+from app.security.security import decode_token, create_access_token, create_refresh_token, revoke_token
+from app.services.user_cache import user_cache
+from app.services.user_import_service import UserImportService, rows_from_request
 from app.services.user_service import UserService
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/users", tags=["users"])
 
 from app.schemas.TokenResponse import TokenResponse
@@ -28,14 +43,55 @@ async def check_if_user_exists(
     return await user_service.check_if_user_exists(userdata)
 
 
-@router.get("", response_model=list[UserSchema])
+@router.post("/check_availability", response_model=AvailabilityResponse)
+async def check_availability(
+        request: AvailabilityRequest,
+        user_service: UserService = UserServiceDependency
+):
+    # Пачка имён и email-ов проверяется одним запросом к БД
+    return await user_service.check_availability(request)
+
+
+@router.get("", response_model=list[UserPublicSchema] | UserPage, response_class=FastJSONResponse)
 async def get_users(
+        request: Request,
         user_id: int | None = None,
         skip: int = 0,
         limit: int = 100,
+        cursor: str | None = None,
+        user_service: UserService = UserServiceDependency
+):
+    # cursor включает keyset-режим: ?cursor= - первая страница,
+    # дальше передаётся next_cursor из предыдущего ответа.
+    # Строки из БД уже в форме ответа: сериализуем сразу, без response_model.
+    # ETag - хеш тела: на опрос без изменений уходит 304 без тела
+    return conditional_json(request, await user_service.get_users(user_id, skip, limit, cursor))
+
+
+@router.get("/search", response_model=UserPage, response_class=FastJSONResponse)
+async def search_users(
+        q: str | None = Query(None, max_length=100),
+        field: Literal["any", "name", "email"] = "any",
+        mode: Literal["prefix", "contains"] = "prefix",
+        domain: str | None = Query(None, max_length=255),
+        limit: int = Query(20, ge=1, le=100),
+        cursor: str | None = None,
+        user_service: UserService = UserServiceDependency
+):
+    # Префикс (автодополнение) или подстрока по name/email, фильтр по домену email.
+    # Дальше страницы - по next_cursor из предыдущего ответа
+    return FastJSONResponse(await user_service.search_users(q, field, mode, domain, limit, cursor))
+
+
+@router.get("/changes", response_model=UserChangePage, response_class=FastJSONResponse)
+async def get_user_changes(
+        cursor: str | None = None,
+        limit: int = Query(500, ge=1, le=5000),
         user_service: UserService = UserServiceDependency
 ):
-    return await user_service.get_users(user_id, skip, limit)
+    # Инкрементальная синхронизация: созданные, изменённые и удалённые пользователи
+    # после курсора. Без курсора - с начала (полная выгрузка), дальше - next_cursor
+    return FastJSONResponse(await user_service.get_changes(cursor, limit))
 
 
 @router.post("", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
@@ -46,6 +102,28 @@ async def post_user(
     return await user_service.post_user(userdata)
 
 
+@router.post(
+    "/import",
+    response_model=UserImportReport,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": {"type": "object"}}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            }
+        }
+    }
+)
+async def import_users(
+        request: Request,
+        import_service: UserImportService = UserImportServiceDependency
+):
+    # JSON-массив, NDJSON или CSV с колонками name,email,password.
+    # NDJSON и CSV читаются потоком и обрабатываются пачками
+    return await import_service.import_users(rows_from_request(request))
+
+
 @router.patch("/{user_id}", response_model=UserSchema)
 async def edit_user(
         user_id: int,
@@ -63,7 +141,7 @@ async def delete_user(
     return await user_service.delete_user(user_id)
 
 
-@router.post("/login")
+@router.post("/login", dependencies=[RateLimitDependency("login")])
 async def login(
         form_data: OAuth2PasswordRequestForm = Depends(),
         db: AsyncSession = Depends(get_async_db)
@@ -75,7 +153,11 @@ async def login(
     )
     user = result.scalars().first()
 
-    if not user or not verify_password(form_data.password, user.password):
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await password_hasher.verify_and_update(form_data.password, user.password)
+
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={
@@ -85,6 +167,14 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    if new_hash:
+        # Хеш с устаревшей стоимостью - перехешируем прозрачно для пользователя
+        try:
+            if await AuthCRUD(db).replace_password_hash(user.id, user.password, new_hash):
+                await user_cache.invalidate(user.id, [user.email])
+        except Exception as e:
+            logger.warning("Password rehash for user %s failed: %s", user.id, e)
+
     return {
         "access_token": create_access_token(data={"sub": user.email, "type": "access"}),
         "refresh_token": create_refresh_token(data={"sub": user.email, "type": "refresh"}),
@@ -95,16 +185,16 @@ async def login(
 @router.post("/refresh")
 async def refresh_the_token(
         refresh_token: str = Body(..., embed=True),
-        db: AsyncSession = Depends(get_async_db)
+        db: AsyncSession = Depends(get_async_db),
+        replica: AsyncSession | None = Depends(get_replica_db)
 ):
     try:
-        payload = decode_token(refresh_token)
+        payload = await decode_token(refresh_token)
         if payload.get("type") != "refresh":
             raise JWTError("Invalid token type")
 
         email = payload.get("sub")
-        result = await db.execute(select(User).where(User.email == email))  # type: ignore
-        user = result.scalars().first()
+        user = await AuthCRUD(db, replica).get_user_by_email(email)
 
         if not user:
             raise JWTError("User not found")
@@ -124,11 +214,11 @@ async def refresh_the_token(
 @router.post("/logout")
 async def logout(refresh_token: str = Body(..., embed=True)):
     try:
-        payload = decode_token(refresh_token)
+        payload = await decode_token(refresh_token)
         if payload.get("type") != "refresh":
             raise HTTPException(status_code=400, detail="Invalid token type")
 
-        token_blacklist.add(refresh_token)
+        await revoke_token(refresh_token, payload)
         return {"message": "Successfully logged out"}
 
     except JWTError as e:
@@ -137,7 +227,21 @@ async def logout(refresh_token: str = Body(..., embed=True)):
 
 @router.get("/me", response_model=UserSchema)
 async def read_current_user(
+        request: Request,
+        response: Response,
         user_service: UserService = UserServiceDependency,
         token: str = Depends(oauth2_scheme),
 ):
-    return await user_service.get_current_user(token)
+    user = await user_service.get_current_user(token)
+
+    # ETag - версия строки (id, updated_at), обычно из кеша пользователей:
+    # на совпадение If-None-Match отвечаем 304, не собирая тело.
+    # У записей кеша без updated_at (до миграции) - по значениям колонок
+    version = user.updated_at.isoformat() if user.updated_at is not None else (user.name, user.email)
+    etag = make_etag(f"{user.id}:{version}")
+    headers = {"Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return not_modified(etag, headers)
+
+    response.headers.update({"ETag": etag, **headers})
+    return user
@@ -0,0 +1,6 @@
+from pydantic import BaseModel, EmailStr, Field
+
+
+class AvailabilityRequest(BaseModel):
+    names: list[str] = Field(default_factory=list, max_length=100)
+    emails: list[EmailStr] = Field(default_factory=list, max_length=100)
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class AvailabilityResponse(BaseModel):
+    # True - значение свободно
+    names: dict[str, bool]
+    emails: dict[str, bool]
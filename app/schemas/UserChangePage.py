@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class UserChange(BaseModel):
+    id: int
+    # У удалённого пользователя (deleted=True) name и email - null
+    name: str | None = None
+    email: str | None = None
+    deleted: bool
+    changed_at: datetime
+
+
+class UserChangePage(BaseModel):
+    items: list[UserChange]
+    # Курсор есть всегда, когда лента не пуста: его сохраняют и передают
+    # при следующей синхронизации, даже если has_more=False
+    next_cursor: str | None = None
+    has_more: bool
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+
+
+class ImportConflict(BaseModel):
+    # row - номер записи в загруженном файле, начиная с 1
+    row: int
+    field: str
+    value: str
+    reason: str
+
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class UserImportReport(BaseModel):
+    total: int
+    created: int
+    conflicts: list[ImportConflict]
+    errors: list[ImportRowError]
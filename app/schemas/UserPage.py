@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+from app.schemas.UserSchema import UserPublicSchema
+
+
+class UserPage(BaseModel):
+    items: list[UserPublicSchema]
+    next_cursor: str | None = None
@@ -10,6 +10,13 @@ class UserSchema(BaseModel):
     password: str | None = None
 
 
+class UserPublicSchema(BaseModel):
+    # Списки и карточки пользователей - без password
+    id: int
+    name: str
+    email: EmailStr
+
+
 class UserUpdateSchema(BaseModel):
     name: Optional[str] = Field(None, min_length=2, max_length=50)
     email: Optional[EmailStr] = Field(None)
@@ -0,0 +1,126 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+from jose import JWTError
+
+
+class JoseBackend:
+    """python-jose - исходная реализация."""
+
+    name = "jose"
+
+    def __init__(self):
+        from jose import jwt
+        self._jwt = jwt
+
+    def encode(self, claims: dict, key: str, algorithm: str) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm)
+
+    def decode(self, token: str, key: str, algorithm: str) -> dict:
+        return self._jwt.decode(token, key, algorithms=[algorithm])
+
+
+class PyJWTBackend:
+    """PyJWT (опциональная зависимость: pip install pyjwt)."""
+
+    name = "pyjwt"
+
+    def __init__(self):
+        import jwt
+        self._jwt = jwt
+
+    def encode(self, claims: dict, key: str, algorithm: str) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm)
+
+    def decode(self, token: str, key: str, algorithm: str) -> dict:
+        try:
+            return self._jwt.decode(
+                token, key, algorithms=[algorithm],
+                # Как в jose: sub и прочее проверяем сами
+                options={"verify_sub": False}
+            )
+        except self._jwt.PyJWTError as e:
+            raise JWTError(str(e))
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+class HmacBackend:
+    """HS256/384/512 на стандартной библиотеке, без лишних слоёв."""
+
+    name = "hmac"
+
+    DIGESTS = {
+        "HS256": hashlib.sha256,
+        "HS384": hashlib.sha384,
+        "HS512": hashlib.sha512,
+    }
+
+    def _digest(self, algorithm: str):
+        try:
+            return self.DIGESTS[algorithm]
+        except KeyError:
+            raise JWTError(f"Algorithm {algorithm} is not supported")
+
+    def encode(self, claims: dict, key: str, algorithm: str) -> str:
+        digest = self._digest(algorithm)
+        header = _b64encode(json.dumps({"alg": algorithm, "typ": "JWT"}, separators=(",", ":")).encode())
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        signing_input = header + b"." + payload
+        signature = _b64encode(hmac.new(key.encode(), signing_input, digest).digest())
+        return (signing_input + b"." + signature).decode()
+
+    def decode(self, token: str, key: str, algorithm: str) -> dict:
+        digest = self._digest(algorithm)
+        try:
+            signing_input, signature = token.encode().rsplit(b".", 1)
+            header_segment, payload_segment = signing_input.split(b".")
+            header = json.loads(_b64decode(header_segment))
+            expected = hmac.new(key.encode(), signing_input, digest).digest()
+            signature = _b64decode(signature)
+        except (ValueError, TypeError):
+            raise JWTError("Error decoding token headers.")
+
+        if not isinstance(header, dict) or header.get("alg") != algorithm:
+            raise JWTError("The specified alg value is not allowed")
+        if not hmac.compare_digest(expected, signature):
+            raise JWTError("Signature verification failed.")
+
+        try:
+            claims = json.loads(_b64decode(payload_segment))
+        except ValueError:
+            raise JWTError("Invalid payload string")
+        if not isinstance(claims, dict):
+            raise JWTError("Invalid payload string: must be a json object")
+
+        now = time.time()
+        for claim in ("exp", "nbf"):
+            if claim in claims and not isinstance(claims[claim], (int, float)):
+                raise JWTError(f"Invalid {claim} claim")
+        if "exp" in claims and claims["exp"] <= now:
+            raise JWTError("Signature has expired.")
+        if "nbf" in claims and claims["nbf"] > now:
+            raise JWTError("The token is not yet valid (nbf)")
+        return claims
+
+
+JWT_BACKENDS = {
+    backend.name: backend
+    for backend in (JoseBackend, PyJWTBackend, HmacBackend)
+}
+
+
+def get_jwt_backend(name: str):
+    try:
+        return JWT_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown JWT backend {name!r}, expected one of {sorted(JWT_BACKENDS)}")
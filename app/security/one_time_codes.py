@@ -0,0 +1,166 @@
+import hashlib
+import hmac
+from dataclasses import dataclass
+
+from app.core.config import settings
+from app.dependencies.redis import RedisClient
+
+ONE_TIME_CODE_KEY_PREFIX = "otp:"
+
+# Каждая операция - один EVALSHA, поэтому проверка, счётчик попыток и
+# погашение кода не разделены сетевыми вызовами и не гоняются между собой.
+# Ключ кода - hash {digest, attempts} или {verified} после проверки,
+# ключ блокировки живёт отдельно, чтобы новый код не сбрасывал блокировку.
+
+# KEYS: код, блокировка; ARGV: digest, ttl_ms. Возвращает 0 или мс до снятия блокировки
+ISSUE_SCRIPT = """
+local locked = redis.call('PTTL', KEYS[2])
+if locked > 0 then
+    return locked
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'digest', ARGV[1], 'attempts', 0)
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+return 0
+"""
+
+# KEYS: код, блокировка; ARGV: digest, max_attempts, lockout_ms, verified_ttl_ms.
+# Возвращает {статус, число}: ok, missing, invalid (осталось попыток), locked (мс)
+VERIFY_SCRIPT = """
+local locked = redis.call('PTTL', KEYS[2])
+if locked > 0 then
+    return {'locked', locked}
+end
+
+local stored = redis.call('HGET', KEYS[1], 'digest')
+if not stored then
+    return {'missing', 0}
+end
+
+-- Сравнение без раннего выхода: время не зависит от позиции расхождения
+local given = ARGV[1]
+local diff = math.abs(#stored - #given)
+for i = 1, #stored do
+    diff = diff + math.abs(string.byte(stored, i) - (string.byte(given, i) or 0))
+end
+
+if diff == 0 then
+    redis.call('HDEL', KEYS[1], 'digest', 'attempts')
+    redis.call('HSET', KEYS[1], 'verified', 1)
+    redis.call('PEXPIRE', KEYS[1], ARGV[4])
+    return {'ok', 0}
+end
+
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+local max_attempts = tonumber(ARGV[2])
+if attempts >= max_attempts then
+    redis.call('DEL', KEYS[1])
+    redis.call('SET', KEYS[2], 1, 'PX', ARGV[3])
+    return {'locked', tonumber(ARGV[3])}
+end
+return {'invalid', max_attempts - attempts}
+"""
+
+# KEYS: код. Гасит подтверждённый код: мс, которые ему оставалось жить, или 0
+CONSUME_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'verified') == '1' then
+    local ttl = redis.call('PTTL', KEYS[1])
+    redis.call('DEL', KEYS[1])
+    return math.max(ttl, 1)
+end
+return 0
+"""
+
+# KEYS: код; ARGV: ttl_ms. Возвращает погашенный код, если за это время не выдан новый
+RESTORE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'verified', 1)
+redis.call('PEXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+@dataclass(frozen=True)
+class CodeCheck:
+    status: str
+    # invalid - сколько попыток осталось, locked - секунд до снятия блокировки
+    remaining: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+class OneTimeCodeStore:
+    """Одноразовые коды и токены в Redis: выдача, проверка с лимитом
+    попыток и погашение. В Redis хранится только HMAC кода."""
+
+    def __init__(
+            self,
+            redis: RedisClient,
+            purpose: str,
+            ttl: int,
+            max_attempts: int,
+            lockout: int,
+            verified_ttl: int
+    ):
+        self.redis = redis
+        self.purpose = purpose
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.lockout = lockout
+        self.verified_ttl = verified_ttl
+
+    def _keys(self, subject: str) -> list[str]:
+        subject = subject.strip().lower()
+        prefix = f"{ONE_TIME_CODE_KEY_PREFIX}{self.purpose}"
+        return [f"{prefix}:{subject}", f"{prefix}:lock:{subject}"]
+
+    def _digest(self, code: str) -> str:
+        return hmac.new(settings.SECRET_KEY.encode(), code.encode(), hashlib.sha256).hexdigest()
+
+    async def issue(self, subject: str, code: str) -> int:
+        """Сохраняет новый код вместо прежнего. Возвращает 0 или, если
+        subject заблокирован, сколько секунд осталось до снятия блокировки."""
+        locked_ms = await self.redis.eval_script(
+            ISSUE_SCRIPT, self._keys(subject), [self._digest(code), self.ttl * 1000]
+        )
+        return -(-int(locked_ms) // 1000)
+
+    async def verify(self, subject: str, code: str) -> CodeCheck:
+        """Проверяет код. Верный код больше не принимается, а ждёт consume;
+        после max_attempts неверных subject блокируется на lockout секунд."""
+        status, value = await self.redis.eval_script(
+            VERIFY_SCRIPT,
+            self._keys(subject),
+            [self._digest(code), self.max_attempts, self.lockout * 1000, self.verified_ttl * 1000]
+        )
+        status = status.decode() if isinstance(status, bytes) else status
+        value = int(value)
+        if status == "locked":
+            value = -(-value // 1000)
+        return CodeCheck(status, value)
+
+    async def consume(self, subject: str) -> int:
+        """Гасит проверенный код. Не 0 только для первого вызова после verify:
+        сколько мс коду оставалось жить - это значение принимает restore."""
+        return int(await self.redis.eval_script(CONSUME_SCRIPT, self._keys(subject)[:1], []))
+
+    async def restore(self, subject: str, ttl_ms: int):
+        """Возвращает код, погашенный consume, если действие после погашения
+        не удалось. Новый код, выданный за это время, не перезаписывается."""
+        await self.redis.eval_script(RESTORE_SCRIPT, self._keys(subject)[:1], [ttl_ms])
+
+
+def reset_code_store(redis: RedisClient) -> OneTimeCodeStore:
+    # Код из письма и токен из ссылки - один и тот же сброс пароля
+    return OneTimeCodeStore(
+        redis,
+        purpose="reset",
+        ttl=settings.RESET_CODE_TTL,
+        max_attempts=settings.RESET_CODE_MAX_ATTEMPTS,
+        lockout=settings.RESET_CODE_LOCKOUT,
+        verified_ttl=settings.RESET_VERIFIED_TTL
+    )
@@ -0,0 +1,153 @@
+import hashlib
+import logging
+import math
+import uuid
+from dataclasses import dataclass
+
+from fastapi import HTTPException, Request
+from starlette import status
+
+from app.core.config import settings
+from app.core.metrics import RATE_LIMITED
+from app.dependencies.redis import RedisClient
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_KEY_PREFIX = "rate:"
+
+# Скользящее окно на sorted set: score - время запроса в мс.
+# Все окна маршрута проверяются атомарно; запрос засчитывается только
+# если он проходит во всех окнах. Возвращает 0 или сколько мс ждать.
+# KEYS - ключи окон; ARGV: member, затем пары limit, window_ms.
+SLIDING_WINDOW_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local member = ARGV[1]
+local retry_after = 0
+
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[i * 2])
+    local window = tonumber(ARGV[i * 2 + 1])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    local count = redis.call('ZCARD', key)
+    if count >= limit then
+        local edge = redis.call('ZRANGE', key, count - limit, count - limit, 'WITHSCORES')
+        local wait = tonumber(edge[2]) + window - now
+        if wait > retry_after then
+            retry_after = wait
+        end
+    end
+end
+
+if retry_after > 0 then
+    return retry_after
+end
+
+for i, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, member)
+    redis.call('PEXPIRE', key, tonumber(ARGV[i * 2 + 1]))
+end
+return 0
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    key: str
+    limit: int
+    window: int
+
+    @classmethod
+    def parse(cls, rule: str) -> "RateLimitRule":
+        # "identifier:5/60" - не больше 5 запросов на идентификатор за 60 секунд
+        key, _, quota = rule.partition(":")
+        limit, _, window = quota.partition("/")
+        if key not in IDENTITY_EXTRACTORS or not limit.isdigit() or not window.isdigit():
+            raise ValueError(f"Invalid rate limit rule: {rule!r}")
+        return cls(key, int(limit), int(window))
+
+
+def client_ip(request: Request) -> str | None:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else None
+
+
+async def form_identifier(request: Request) -> str | None:
+    # Тело уже разобрано FastAPI и закешировано в Request
+    form = await request.form()
+    username = form.get("username")
+    return username.strip().lower() if isinstance(username, str) and username.strip() else None
+
+
+async def json_email(request: Request) -> str | None:
+    try:
+        body = await request.json()
+    except ValueError:
+        return None
+    email = body.get("email") if isinstance(body, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+async def _ip(request: Request) -> str | None:
+    return client_ip(request)
+
+
+IDENTITY_EXTRACTORS = {
+    "ip": _ip,
+    "identifier": form_identifier,
+    "email": json_email,
+}
+
+
+class RateLimiter:
+    """Ограничивает частоту запросов по маршрутам. Проверка идёт до
+    обработчика, то есть до bcrypt и отправки писем."""
+
+    def __init__(self, rules: dict[str, list[str]], enabled: bool = True):
+        self.enabled = enabled
+        self.rules = {
+            route: [RateLimitRule.parse(rule) for rule in route_rules]
+            for route, route_rules in rules.items()
+        }
+
+    @staticmethod
+    def _key(route: str, rule: RateLimitRule, value: str) -> str:
+        # Значение хешируется: длина ключа не зависит от присланных данных
+        digest = hashlib.sha256(value.encode()).hexdigest()[:32]
+        return f"{RATE_LIMIT_KEY_PREFIX}{route}:{rule.key}:{rule.window}:{digest}"
+
+    async def check(self, route: str, request: Request, redis: RedisClient):
+        rules = self.rules.get(route)
+        if not self.enabled or not rules:
+            return
+
+        keys, args = [], [uuid.uuid4().hex]
+        for rule in rules:
+            value = await IDENTITY_EXTRACTORS[rule.key](request)
+            if value is None:
+                continue
+            keys.append(self._key(route, rule, value))
+            args.extend((rule.limit, rule.window * 1000))
+        if not keys:
+            return
+
+        try:
+            retry_after_ms = await redis.eval_script(SLIDING_WINDOW_SCRIPT, keys, args)
+        except Exception as e:
+            # Без Redis не блокируем вход: лимит пропускается, а не валит запрос
+            logger.warning("Rate limit check for %s failed: %s", route, e)
+            return
+
+        if retry_after_ms:
+            RATE_LIMITED.inc(route)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, try again later",
+                headers={"Retry-After": str(max(1, math.ceil(int(retry_after_ms) / 1000)))}
+            )
+
+
+rate_limiter = RateLimiter(settings.RATE_LIMITS, enabled=settings.RATE_LIMIT_ENABLED)
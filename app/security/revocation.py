@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import logging
+import time
+
+from app.core.config import settings
+from app.dependencies.redis import RedisClient
+
+logger = logging.getLogger(__name__)
+
+REVOKED_KEY_PREFIX = "revoked:"
+
+
+def token_id(payload: dict, token: str) -> str:
+    """jti токена; для старых токенов без jti - хеш самого токена."""
+    return payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenRevocationStore:
+    """Отозванные токены хранятся в Redis (ключ по jti, TTL до истечения токена).
+
+    Каждый воркер держит ограниченную локальную копию, которая обновляется
+    через pub/sub, поэтому проверка в decode_token обычно не ходит в Redis.
+    Действующие записи из копии не вытесняются: если она переполнена, новые
+    отзывы остаются только в Redis, и промах проверяется там (EXISTS).
+    """
+
+    def __init__(self, channel: str, max_size: int):
+        self.channel = channel
+        self.max_size = max_size
+        self._revoked: dict[str, float] = {}  # jti -> exp
+        # До этого момента в Redis могут быть отзывы, которых нет в локальной копии
+        self._overflow_until = 0.0
+        self._redis: RedisClient | None = None
+        self._listener: asyncio.Task | None = None
+
+    async def is_revoked(self, jti: str) -> bool:
+        now = time.time()
+        exp = self._revoked.get(jti)
+        if exp is not None:
+            if exp > now:
+                return True
+            # Токен истёк сам по себе - запись больше не нужна
+            self._revoked.pop(jti, None)
+            return False
+
+        if self._overflow_until <= now or self._redis is None:
+            return False
+        try:
+            return bool(await self._redis.exists(f"{REVOKED_KEY_PREFIX}{jti}"))
+        except Exception as e:
+            # Не можем проверить - считаем отозванным, а не пропускаем
+            logger.warning("Token revocation lookup failed: %s", e)
+            return True
+
+    def _remember(self, jti: str, exp: float):
+        if jti not in self._revoked and len(self._revoked) >= self.max_size:
+            self._purge_expired()
+            if len(self._revoked) >= self.max_size:
+                # Действующие отзывы не вытесняем: этот остаётся только в Redis
+                if self._overflow_until <= time.time():
+                    logger.warning("Token revocation cache is full, checking misses in Redis")
+                self._overflow_until = max(self._overflow_until, exp)
+                return
+        self._revoked[jti] = exp
+
+    def _purge_expired(self):
+        now = time.time()
+        for jti in [jti for jti, exp in self._revoked.items() if exp <= now]:
+            del self._revoked[jti]
+
+    def _on_message(self, data: bytes):
+        try:
+            jti, exp = data.decode().split(" ")
+            self._remember(jti, float(exp))
+        except ValueError:
+            logger.warning("Malformed token revocation message: %r", data)
+
+    async def _load(self):
+        keys = await self._redis.scan_keys(f"{REVOKED_KEY_PREFIX}*")
+        values = await self._redis.mget(keys)
+        for key, exp in zip(keys, values):
+            if exp is not None:
+                self._remember(key.decode()[len(REVOKED_KEY_PREFIX):], float(exp))
+
+    async def revoke(self, jti: str, exp: float):
+        ttl = int(exp - time.time()) + 1
+        if ttl <= 0:
+            return
+
+        self._remember(jti, exp)
+        await self._redis.setex_and_publish(
+            f"{REVOKED_KEY_PREFIX}{jti}", ttl, str(exp),
+            self.channel, f"{jti} {exp}"
+        )
+
+    def start(self, redis: RedisClient):
+        self._redis = redis
+        self._listener = asyncio.create_task(
+            redis.listen(self.channel, self._on_message, on_subscribe=self._load)
+        )
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+revocation_store = TokenRevocationStore(
+    channel=settings.TOKEN_REVOCATION_CHANNEL,
+    max_size=settings.TOKEN_REVOCATION_CACHE_SIZE
+)
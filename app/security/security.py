@@ -1,9 +1,16 @@
+import calendar
 import os
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
 
 from dotenv import load_dotenv
-from jose import jwt, JWTError
+from jose import JWTError
+
+from app.core.config import settings
+from app.security.jwt_backends import get_jwt_backend
+from app.security.revocation import revocation_store, token_id
+from app.security.token_cache import VerifiedTokenCache
 
 load_dotenv()
 
@@ -12,7 +19,13 @@ ALGORITHM = "HS256"  # Алгоритм подписи
 ACCESS_TOKEN_EXPIRE_MINUTES = 30  # Время жизни токена
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
-token_blacklist = set()
+jwt_backend = get_jwt_backend(settings.JWT_BACKEND)
+verified_tokens = VerifiedTokenCache(settings.JWT_VERIFIED_CACHE_SIZE)
+
+
+def _timestamp(moment: datetime) -> int:
+    # Так же, как jose переводит datetime в exp
+    return calendar.timegm(moment.utctimetuple())
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -25,8 +38,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.now() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode.update({"exp": _timestamp(expire), "jti": uuid.uuid4().hex})
+    encoded_jwt = jwt_backend.encode(to_encode, SECRET_KEY, ALGORITHM)
     return encoded_jwt
 
 
@@ -34,15 +47,27 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Создает Refresh Token."""
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
-    to_encode.update({"exp": expire, "type": "refresh"})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode.update({"exp": _timestamp(expire), "type": "refresh", "jti": uuid.uuid4().hex})
+    return jwt_backend.encode(to_encode, SECRET_KEY, ALGORITHM)
 
 
-def decode_token(token: str):
-    """Декодирует JWT и проверяет, не в черном списке ли он."""
-    if token in token_blacklist:
+async def decode_token(token: str):
+    """Декодирует JWT и проверяет, не отозван ли он."""
+    # Подпись уже проверенного и ещё не истёкшего токена не пересчитываем
+    payload = verified_tokens.get(token)
+    if payload is None:
+        try:
+            payload = jwt_backend.decode(token, SECRET_KEY, ALGORITHM)
+        except JWTError as e:
+            raise JWTError(f"Invalid token: {e}")
+        verified_tokens.put(token, payload)
+
+    # Отзыв проверяем всегда - кеш не должен его обходить
+    if await revocation_store.is_revoked(token_id(payload, token)):
         raise JWTError("Token revoked")
-    try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError as e:
-        raise JWTError(f"Invalid token: {e}")
+    return dict(payload)
+
+
+async def revoke_token(token: str, payload: dict):
+    """Отзывает токен во всех воркерах до истечения его срока действия."""
+    await revocation_store.revoke(token_id(payload, token), payload["exp"])
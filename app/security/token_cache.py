@@ -0,0 +1,43 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+
+class VerifiedTokenCache:
+    """LRU уже проверенных токенов: sha256(token) -> claims.
+
+    Запись живёт до exp токена, поэтому повторная проверка подписи
+    для одного и того же токена не нужна.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._claims: OrderedDict[bytes, dict] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        key = self._key(token)
+        claims = self._claims.get(key)
+        if claims is None:
+            return None
+        if claims["exp"] <= time.time():
+            del self._claims[key]
+            return None
+        self._claims.move_to_end(key)
+        return claims
+
+    def put(self, token: str, claims: dict):
+        # Без exp токен бессрочный - такие не кешируем
+        if self.max_size <= 0 or not isinstance(claims.get("exp"), (int, float)):
+            return
+        key = self._key(token)
+        self._claims[key] = claims
+        self._claims.move_to_end(key)
+        if len(self._claims) > self.max_size:
+            self._claims.popitem(last=False)
+
+    def clear(self):
+        self._claims.clear()
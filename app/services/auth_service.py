@@ -1,31 +1,53 @@
-import random
+import secrets
 from datetime import timedelta
 
-import aiosmtplib
 from fastapi import HTTPException
 from pydantic import EmailStr
+from starlette import status
 
 from app.crud.auth.read import AuthCRUD
-from app.dependencies.redis import RedisClient
 from app.schemas.ChangePasswordRequest import ChangePasswordRequest
 from app.schemas.EmailRequest import EmailRequest
 from app.schemas.ResetRequest import ResetRequest
+from app.security.one_time_codes import CodeCheck, OneTimeCodeStore
 from app.security.security import create_access_token
-from app.services.email_service import EmailService
+from app.services.email_outbox import EmailOutbox
+from app.services.user_cache import UserCache
 
 
 class AuthService:
     def __init__(
             self,
-            redis: RedisClient,
-            email_service: EmailService,
-            auth_crud: AuthCRUD
+            reset_codes: OneTimeCodeStore,
+            email_outbox: EmailOutbox,
+            auth_crud: AuthCRUD,
+            user_cache: UserCache
     ):
-        self.redis = redis
-        self.email_service = email_service
+        self.reset_codes = reset_codes
+        self.email_outbox = email_outbox
         self.auth_crud = auth_crud
-
-
+        self.user_cache = user_cache
+
+    @staticmethod
+    def _locked(retry_after: int) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Слишком много неверных попыток, попробуйте позже",
+            headers={"Retry-After": str(max(1, retry_after))}
+        )
+
+    async def _issue(self, email: str, code: str):
+        retry_after = await self.reset_codes.issue(email, code)
+        if retry_after:
+            raise self._locked(retry_after)
+
+    def _check(self, check: CodeCheck, missing: str, invalid: str):
+        if check.status == "locked":
+            raise self._locked(check.remaining)
+        if check.status == "missing":
+            raise HTTPException(status_code=400, detail=missing)
+        if not check.ok:
+            raise HTTPException(status_code=400, detail=invalid)
 
     async def send_reset_password(self, email: EmailStr):
         user = await self.auth_crud.get_user_by_email(email)
@@ -35,67 +57,61 @@ class AuthService:
         url = f"http://localhost:5173/reset-password-page/{token}"
 
         try:
-            await self.email_service.send_email(email, "Сброс пароля", f'Перейдите по ссылке для сброса пароля:\n{url}')
-            await self.redis.setex(f'reset:{email}', 180, token)
+            # Письмо уходит в фоне из очереди, токен сохраняем до постановки в очередь
+            await self._issue(email, token)
+            await self.email_outbox.enqueue(email, "Сброс пароля", f'Перейдите по ссылке для сброса пароля:\n{url}')
 
             return {"success": True}
-        except aiosmtplib.SMTPAuthenticationError:
-            raise HTTPException(status_code=500, detail="Ошибка аутентификации в SMTP")
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Ошибка при отправке письма: {str(e)}")
 
     async def verify_reset_password(self, request: EmailRequest):
-        email = request.email
-        token = request.token
-
-        stored_token = await self.redis.get(f'reset:{email}')
-
-        if not stored_token:
-            raise HTTPException(status_code=400, detail="Токен не найден или истёк")
-
-        stored_token = stored_token.decode()
-
-        if stored_token != token:
+        if not request.token:
             raise HTTPException(status_code=400, detail="Неверный токен")
 
+        check = await self.reset_codes.verify(request.email, request.token)
+        self._check(check, missing="Токен не найден или истёк", invalid="Неверный токен")
+
         return {"success": True}
 
 
     async def change_password(self, request: ChangePasswordRequest):
+        # Пароль меняется только один раз на каждый проверенный код или токен:
+        # код гасится до смены пароля, чтобы параллельный запрос его не использовал,
+        # и возвращается, если смена пароля не дошла до commit
+        ttl_ms = await self.reset_codes.consume(request.email)
+        if not ttl_ms:
+            raise HTTPException(status_code=400, detail="Сброс пароля не подтверждён или истёк")
 
-        db_user = await self.auth_crud.get_user_by_email(request.email)
-
-        user = await self.auth_crud.update_user_password(db_user, request.new_password)
-        await self.auth_crud.save_user_in_db(user)
-        await self.redis.delete(f"reset:{request.email}")
+        try:
+            user = await self.auth_crud.update_user_password(request.email, request.new_password)
+        except Exception:
+            await self.reset_codes.restore(request.email, ttl_ms)
+            raise
+        await self.user_cache.invalidate(user.id, [user.email])
 
         return {"success": True}
 
 
     async def send_reset_code(self, email: EmailStr):
-        code = str(random.randint(100000, 999999))
+        code = str(100000 + secrets.randbelow(900000))
 
         try:
-            await self.email_service.send_email(email, "Confirmation code", f"Ваш код подтверждения: {code}")
-            await self.redis.setex(f"reset:{email}", 180, code)
+            await self._issue(email, code)
+            await self.email_outbox.enqueue(email, "Confirmation code", f"Ваш код подтверждения: {code}")
             return {"success": True}
-        except aiosmtplib.SMTPAuthenticationError:
-            raise HTTPException(status_code=500, detail="Ошибка аутентификации в SMTP")
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Ошибка при отправке письма: {str(e)}")
 
     async def verify_reset_code(self, data: ResetRequest):
-        email = data.email
-        input_code = data.code
-
-        stored_code = await self.redis.get(f"reset:{email}")
-
-        if not stored_code:
-            raise HTTPException(status_code=400, detail="Код не найден или истёк")
-
-        stored_code = stored_code.decode()
-
-        if stored_code != input_code:
+        if not data.code:
             raise HTTPException(status_code=400, detail="Неверный код")
 
+        check = await self.reset_codes.verify(data.email, data.code)
+        self._check(check, missing="Код не найден или истёк", invalid="Неверный код")
+
         return {"success": True}
\ No newline at end of file
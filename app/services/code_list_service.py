@@ -0,0 +1,66 @@
+import asyncio
+import logging
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+CODE_LIST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
+    "Accept": "application/json",
+    "Referer": "https://google.com/",
+}
+
+
+class CodeListCache:
+    """Закешированный list.json: отдаётся из памяти, по истечении TTL
+    перепроверяется через ETag/If-Modified-Since одним общим запросом."""
+
+    def __init__(self, client: httpx.AsyncClient, url: str, ttl: float):
+        self.client = client
+        self.url = url
+        self.ttl = ttl
+        self._data: dict | None = None
+        self._etag: str | None = None
+        self._last_modified: str | None = None
+        self._expires_at = 0.0
+        self._refresh: asyncio.Task | None = None
+
+    async def get(self) -> dict:
+        if self._data is not None and time.monotonic() < self._expires_at:
+            return self._data
+
+        # Single-flight: все ждущие запросы разделяют одно обращение к источнику
+        if self._refresh is None:
+            self._refresh = asyncio.create_task(self._revalidate())
+            self._refresh.add_done_callback(self._refresh_done)
+        # shield - отмена одного клиентского запроса не отменяет общее обновление
+        return await asyncio.shield(self._refresh)
+
+    def _refresh_done(self, _task: asyncio.Task):
+        self._refresh = None
+
+    async def _revalidate(self) -> dict:
+        headers = dict(CODE_LIST_HEADERS)
+        if self._data is not None:
+            if self._etag:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified:
+                headers["If-Modified-Since"] = self._last_modified
+
+        try:
+            response = await self.client.get(self.url, headers=headers)
+            if response.status_code != 304 or self._data is None:
+                response.raise_for_status()
+                self._data = response.json()
+                self._etag = response.headers.get("ETag")
+                self._last_modified = response.headers.get("Last-Modified")
+        except httpx.HTTPError as e:
+            if self._data is None:
+                raise
+            # Источник недоступен - продолжаем отдавать прошлую версию
+            logger.warning("Code list revalidation failed, serving stale copy: %s", e)
+
+        self._expires_at = time.monotonic() + self.ttl
+        return self._data
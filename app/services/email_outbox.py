@@ -0,0 +1,197 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+import aiosmtplib
+from pydantic import EmailStr
+
+from app.core.config import settings
+from app.dependencies.redis import RedisClient
+from app.services.email_service import EmailService
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_KEY = "email:outbox"
+RETRY_KEY = "email:outbox:retry"  # sorted set, score - время следующей попытки
+DEAD_KEY = "email:outbox:dead"
+# Взятые воркером письма лежат в его списке, пока не отправлены (LMOVE + LREM),
+# поэтому падение или остановка воркера их не теряет
+PROCESSING_KEY_PREFIX = "email:outbox:processing:"
+WORKER_KEY_PREFIX = "email:outbox:worker:"  # отметка живого воркера с TTL
+
+
+class EmailOutbox:
+    """Ставит письма в очередь в Redis; отправляет их EmailOutboxWorker."""
+
+    def __init__(self, redis: RedisClient):
+        self.redis = redis
+
+    async def enqueue(self, to: EmailStr, subject: str, content: str):
+        message = {
+            "id": uuid.uuid4().hex,
+            "to": to,
+            "subject": subject,
+            "content": content,
+            "attempts": 0
+        }
+        await self.redis.lpush(OUTBOX_KEY, json.dumps(message))
+
+
+class EmailOutboxWorker:
+    """Фоновая отправка писем из очереди: пачками, через пул SMTP-соединений,
+    с повторными попытками и экспоненциальной задержкой.
+
+    Доставка at-least-once: письмо удаляется из списка воркера только после
+    отправки или переноса в retry/dead, при сбое между ними возможен повтор."""
+
+    def __init__(
+            self,
+            redis: RedisClient,
+            email_service: EmailService,
+            batch_size: int = 20,
+            max_attempts: int = 5,
+            retry_base_delay: float = 5.0,
+            retry_max_delay: float = 600.0,
+            poll_timeout: int = 1,
+            worker_ttl: int = 30
+    ):
+        self.redis = redis
+        self.email_service = email_service
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.poll_timeout = poll_timeout
+        self.worker_ttl = worker_ttl
+        self.worker_id = uuid.uuid4().hex
+        self.processing_key = f"{PROCESSING_KEY_PREFIX}{self.worker_id}"
+        self._next_recovery = 0.0
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+
+    async def _requeue_due_retries(self):
+        due = await self.redis.zrangebyscore(RETRY_KEY, 0, time.time(), self.batch_size)
+        if not due:
+            return
+
+        # Письмо забирает только тот воркер, чей ZREM его удалил
+        async with self.redis.pipeline() as pipe:
+            for raw in due:
+                pipe.zrem(RETRY_KEY, raw)
+            removed = await pipe.execute()
+
+        claimed = [raw for raw, ok in zip(due, removed) if ok]
+        if claimed:
+            await self.redis.rpush(OUTBOX_KEY, *claimed)
+
+    async def _heartbeat(self):
+        await self.redis.set(f"{WORKER_KEY_PREFIX}{self.worker_id}", "1", self.worker_ttl)
+
+    async def _recover_orphans(self):
+        """Возвращает в очередь письма из списков воркеров, чья отметка истекла."""
+        for key in await self.redis.scan_keys(f"{PROCESSING_KEY_PREFIX}*"):
+            worker_id = key.decode()[len(PROCESSING_KEY_PREFIX):]
+            if worker_id == self.worker_id or await self.redis.exists(f"{WORKER_KEY_PREFIX}{worker_id}"):
+                continue
+            moved = 0
+            while batch := await self.redis.lmove(key.decode(), OUTBOX_KEY, self.batch_size):
+                moved += len(batch)
+            if moved:
+                logger.warning("Requeued %s emails left by stopped outbox worker %s", moved, worker_id)
+
+    async def _take_batch(self) -> list[bytes]:
+        first = await self.redis.blmove(OUTBOX_KEY, self.processing_key, self.poll_timeout)
+        if first is None:
+            return []
+
+        batch = [first]
+        if self.batch_size > 1:
+            batch += await self.redis.lmove(OUTBOX_KEY, self.processing_key, self.batch_size - 1)
+        return batch
+
+    async def _ack(self, raw: bytes):
+        await self.redis.lrem(self.processing_key, raw)
+
+    async def _deliver(self, raw: bytes):
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            logger.error("Dropping malformed outbox message: %r", raw)
+            await self._ack(raw)
+            return
+
+        # При отмене (CancelledError) письмо остаётся в списке воркера и вернётся в очередь
+        try:
+            await self.email_service.send_email(message["to"], message["subject"], message["content"])
+        except aiosmtplib.SMTPRecipientsRefused as e:
+            # Адрес отклонён - повтор не поможет
+            logger.error("Recipient %s refused: %s", message["to"], e)
+            await self.redis.lpush(DEAD_KEY, json.dumps(message))
+        except Exception as e:
+            await self._retry_later(message, e)
+        await self._ack(raw)
+
+    async def _retry_later(self, message: dict, error: Exception):
+        message["attempts"] += 1
+        if message["attempts"] >= self.max_attempts:
+            logger.error("Giving up on email to %s after %s attempts: %s",
+                         message["to"], message["attempts"], error)
+            await self.redis.lpush(DEAD_KEY, json.dumps(message))
+            return
+
+        delay = min(self.retry_base_delay * 2 ** (message["attempts"] - 1), self.retry_max_delay)
+        logger.warning("Email to %s failed (attempt %s), retrying in %ss: %s",
+                       message["to"], message["attempts"], delay, error)
+        await self.redis.zadd(RETRY_KEY, {json.dumps(message): time.time() + delay})
+
+    async def run(self):
+        while not self._stopping:
+            try:
+                await self._heartbeat()
+                if time.monotonic() >= self._next_recovery:
+                    await self._recover_orphans()
+                    self._next_recovery = time.monotonic() + self.worker_ttl
+                await self._requeue_due_retries()
+                batch = await self._take_batch()
+                # Параллельность ограничена размером пула SMTP-соединений
+                await asyncio.gather(*(self._deliver(raw) for raw in batch))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Email outbox worker error: %s", e)
+                await asyncio.sleep(self.poll_timeout)
+
+    def start(self):
+        self._stopping = False
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        # Не отменяем посреди отправки: цикл дошлёт текущую пачку (SMTP-вызовы
+        # ограничены своими таймаутами) и выйдет после ожидания BLMOVE
+        self._stopping = True
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Недосланное (если было) другой воркер вернёт в очередь сразу, без ожидания TTL
+        try:
+            await self.redis.delete(f"{WORKER_KEY_PREFIX}{self.worker_id}")
+        except Exception as e:
+            logger.warning("Failed to clear outbox worker mark: %s", e)
+
+
+def create_outbox_worker(redis: RedisClient, email_service: EmailService) -> EmailOutboxWorker:
+    return EmailOutboxWorker(
+        redis,
+        email_service,
+        batch_size=settings.EMAIL_OUTBOX_BATCH_SIZE,
+        max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+        retry_base_delay=settings.EMAIL_OUTBOX_RETRY_BASE_DELAY,
+        retry_max_delay=settings.EMAIL_OUTBOX_RETRY_MAX_DELAY,
+        worker_ttl=settings.EMAIL_OUTBOX_WORKER_TTL
+    )
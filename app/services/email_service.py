@@ -1,31 +1,100 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
 from email.message import EmailMessage
 
 import aiosmtplib
 from pydantic import EmailStr
 
 from app.core.config import settings
+from app.core.metrics import SMTP_SEND_DURATION
+
+
+class SMTPConnectionPool:
+    """Пул авторизованных SMTP-соединений, которые переиспользуются между письмами."""
+
+    def __init__(self, size: int):
+        self._idle: asyncio.LifoQueue[aiosmtplib.SMTP | None] = asyncio.LifoQueue()
+        # None - свободный слот, соединение для него откроется при первом письме
+        for _ in range(size):
+            self._idle.put_nowait(None)
+
+    @staticmethod
+    async def _connect() -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            use_tls=settings.SMTP_USE_TLS,
+            start_tls=settings.SMTP_START_TLS,
+            timeout=settings.SMTP_TIMEOUT,
+            # Без пароля (например, локальный aiosmtpd) логин не выполняется
+            username=settings.EMAIL_USER if settings.EMAIL_PASSWORD else None,
+            password=settings.EMAIL_PASSWORD or None
+        )
+        # connect() сам делает STARTTLS и логин
+        await smtp.connect()
+        return smtp
+
+    @asynccontextmanager
+    async def connection(self):
+        smtp = await self._idle.get()
+        try:
+            if smtp is None or not smtp.is_connected:
+                smtp = await self._connect()
+            yield smtp
+        except Exception:
+            if smtp is not None:
+                smtp.close()
+            smtp = None
+            raise
+        finally:
+            self._idle.put_nowait(smtp)
+
+    async def close(self):
+        while not self._idle.empty():
+            smtp = self._idle.get_nowait()
+            if smtp is not None and smtp.is_connected:
+                try:
+                    await smtp.quit()
+                except aiosmtplib.SMTPException:
+                    smtp.close()
 
 
 class EmailService:
     def __init__(self):
-        self.smtp_host = settings.SMTP_HOST
-        self.smtp_port = settings.SMTP_PORT
         self.email_user = settings.EMAIL_USER
-        self.email_password = settings.EMAIL_PASSWORD
+        # Число соединений ограничивает и число одновременных отправок
+        self.pool = SMTPConnectionPool(settings.SMTP_POOL_SIZE)
 
-
-    async def send_email(self, to: EmailStr, subject: str, content: str):
+    def build_message(self, to: EmailStr, subject: str, content: str) -> EmailMessage:
         message = EmailMessage()
         message["FROM"] = self.email_user
         message["TO"] = to
         message["Subject"] = subject
         message.set_content(content)
+        return message
+
+    async def send_email(self, to: EmailStr, subject: str, content: str):
+        message = self.build_message(to, subject, content)
+
+        start = time.perf_counter()
+        result = "error"
+        try:
+            try:
+                async with self.pool.connection() as smtp:
+                    await smtp.send_message(message)
+            except aiosmtplib.SMTPServerDisconnected:
+                # Сервер мог закрыть простаивавшее соединение - повторяем один раз на новом
+                async with self.pool.connection() as smtp:
+                    await smtp.send_message(message)
+            result = "ok"
+        finally:
+            SMTP_SEND_DURATION.observe(time.perf_counter() - start, result)
+
+    async def ping(self):
+        # NOOP на соединении из пула: проверяет и сервер, и сам пул
+        async with self.pool.connection() as smtp:
+            await smtp.noop()
 
-        await aiosmtplib.send(
-            message,
-            hostname=self.smtp_host,
-            port=self.smtp_port,
-            start_tls=True,
-            username=self.email_user,
-            password=self.email_password
-        )
\ No newline at end of file
+    async def close(self):
+        await self.pool.close()
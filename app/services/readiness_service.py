@@ -0,0 +1,74 @@
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.dependencies.redis import RedisClient
+from app.services.email_service import EmailService
+
+Check = Callable[[], Awaitable[object]]
+
+
+def db_check(engine: AsyncEngine) -> Check:
+    async def check():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    return check
+
+
+def redis_check(redis: RedisClient) -> Check:
+    return redis.ping
+
+
+def smtp_check(email_service: EmailService) -> Check:
+    return email_service.ping
+
+
+class ReadinessChecker:
+    """Проверяет зависимости параллельно, каждую со своим таймаутом.
+    Результат кешируется на ttl секунд, а одновременные пробы балансировщиков
+    ждут одну общую проверку, поэтому нагрузка на БД/Redis от проб постоянна."""
+
+    def __init__(self, checks: dict[str, Check], timeout: float, ttl: float):
+        self.checks = checks
+        self.timeout = timeout
+        self.ttl = ttl
+        self._result: dict | None = None
+        self._expires_at = 0.0
+        self._running: asyncio.Task | None = None
+
+    async def check(self) -> dict:
+        if self._result is not None and time.monotonic() < self._expires_at:
+            return self._result
+
+        if self._running is None:
+            self._running = asyncio.create_task(self._run_checks())
+            self._running.add_done_callback(self._running_done)
+        return await asyncio.shield(self._running)
+
+    def _running_done(self, _task: asyncio.Task):
+        self._running = None
+
+    async def _run_one(self, check: Check) -> dict:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(check(), self.timeout)
+            result = {"status": "ok"}
+        except asyncio.TimeoutError:
+            result = {"status": "error", "error": f"Timed out after {self.timeout}s"}
+        except Exception as e:
+            result = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+
+    async def _run_checks(self) -> dict:
+        names = list(self.checks)
+        results = await asyncio.gather(*(self._run_one(self.checks[name]) for name in names))
+        checks = dict(zip(names, results))
+        ready = all(result["status"] == "ok" for result in checks.values())
+
+        self._result = {"status": "ready" if ready else "unavailable", "checks": checks}
+        self._expires_at = time.monotonic() + self.ttl
+        return self._result
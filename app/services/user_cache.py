@@ -0,0 +1,250 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, registry
+from app.db.models import User
+from app.db.replica import replica_router
+from app.dependencies.redis import RedisClient
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_PREFIX = "user_cache:"
+# Поколение ключа: растёт при каждой инвалидации. Строка, прочитанная из БД
+# до инвалидации, не записывается в кеш после неё
+USER_CACHE_GENERATION_PREFIX = "user_cache:gen:"
+
+# KEYS: поколение ключа поиска, затем ключи записи; ARGV: поколение до чтения из БД, ttl, данные
+STORE_SCRIPT = """
+if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] then
+    return 0
+end
+for i = 2, #KEYS do
+    redis.call('SETEX', KEYS[i], ARGV[2], ARGV[3])
+end
+return 1
+"""
+
+# Хеш пароля в кеш не попадает: он нужен только при входе, там он читается из БД
+CACHED_COLUMNS = tuple(column.name for column in User.__table__.columns if column.name != "password")
+
+
+def user_to_dict(user: User) -> dict:
+    data = {name: getattr(user, name) for name in CACHED_COLUMNS}
+    # В Redis - JSON: время строкой ISO 8601
+    if data.get("updated_at") is not None:
+        data["updated_at"] = data["updated_at"].isoformat()
+    return data
+
+
+def user_from_dict(data: dict) -> User:
+    # Объект не привязан к сессии - только для чтения
+    data = {name: value for name, value in data.items() if name in CACHED_COLUMNS}
+    if data.get("updated_at") is not None:
+        data["updated_at"] = datetime.fromisoformat(data["updated_at"])
+    return User(**data)
+
+
+class UserCache:
+    """Read-through кеш пользователей: локальный LRU в процессе + Redis.
+
+    Ключи - "id:<id>" и "email:<email>". Записи сбрасываются явно через
+    invalidate(), другие воркеры узнают об этом через pub/sub. Пароль
+    (хеш) не кешируется - у пользователя из кеша password=None.
+    """
+
+    def __init__(self, local_size: int, local_ttl: float, redis_ttl: int, channel: str):
+        self.local_size = local_size
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        self.channel = channel
+        self._local: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        # Растёт при каждом локальном сбросе: чтение, начатое до сброса, не кладёт запись
+        self._local_generation = 0
+        self._redis: RedisClient | None = None
+        self._listener: asyncio.Task | None = None
+
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def stats(self) -> dict:
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "local_size": len(self._local),
+        }
+
+    def _get_local(self, key: str) -> dict | None:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if expires_at <= time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return data
+
+    def _set_local(self, key: str, data: dict):
+        self._local[key] = (time.monotonic() + self.local_ttl, data)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    async def _get_redis(self, key: str) -> tuple[dict | None, bytes | None]:
+        """Запись и поколение ключа - одним MGET."""
+        if self._redis is None:
+            return None, None
+        try:
+            raw, generation = await self._redis.mget(
+                [USER_CACHE_PREFIX + key, USER_CACHE_GENERATION_PREFIX + key]
+            )
+        except RedisError as e:
+            logger.warning("User cache read failed: %s", e)
+            return None, None
+        return (json.loads(raw) if raw else None), generation
+
+    async def _store(self, key: str, data: dict, generation: bytes | None, local_generation: int) -> bool:
+        keys = [f"id:{data['id']}", f"email:{data['email']}"]
+        if self._redis is not None:
+            try:
+                stored = await self._redis.eval_script(
+                    STORE_SCRIPT,
+                    [USER_CACHE_GENERATION_PREFIX + key, *(USER_CACHE_PREFIX + k for k in keys)],
+                    [generation or b"0", self.redis_ttl, json.dumps(data)]
+                )
+            except RedisError as e:
+                logger.warning("User cache write failed: %s", e)
+                return False
+            if not stored:
+                return False
+
+        if self._local_generation != local_generation:
+            return False
+        for k in keys:
+            self._set_local(k, data)
+        return True
+
+    async def _get(self, key: str, loader: Callable[[], Awaitable[User | None]]) -> User | None:
+        data = self._get_local(key)
+        if data is not None:
+            self.local_hits += 1
+            return user_from_dict(data)
+
+        local_generation = self._local_generation
+        data, generation = await self._get_redis(key)
+        if data is not None:
+            self.redis_hits += 1
+            if self._local_generation == local_generation:
+                self._set_local(key, data)
+            return user_from_dict(data)
+
+        self.misses += 1
+        user = await loader()
+        if user is None:
+            return None
+        # Пока шло чтение из БД, пользователя могли изменить: тогда не кешируем
+        data = user_to_dict(user)
+        await self._store(key, data, generation, local_generation)
+        # Тот же вид, что и из кеша: без пароля и без привязки к сессии
+        return user_from_dict(data)
+
+    async def get_by_email(self, email: str, loader: Callable[[], Awaitable[User | None]]) -> User | None:
+        return await self._get(f"email:{email}", loader)
+
+    async def get_by_id(self, user_id: int, loader: Callable[[], Awaitable[User | None]]) -> User | None:
+        return await self._get(f"id:{user_id}", loader)
+
+    def _evict_local(self, keys: list[str]):
+        self._local_generation += 1
+        for key in keys:
+            self._local.pop(key, None)
+        # Инвалидация = запись: пока реплика догоняет, эти ключи читаются с primary.
+        # Через pub/sub это же происходит во всех воркерах
+        replica_router.pin(keys)
+
+    async def invalidate(self, user_id: int | None = None, emails: list[str] | None = None):
+        keys = [f"email:{email}" for email in emails or [] if email]
+        if user_id is not None:
+            keys.append(f"id:{user_id}")
+        if not keys:
+            return
+
+        self.invalidations += 1
+        self._evict_local(keys)
+
+        if self._redis is None:
+            return
+        try:
+            async with self._redis.pipeline() as pipe:
+                pipe.delete(*(USER_CACHE_PREFIX + key for key in keys))
+                for key in keys:
+                    pipe.incr(USER_CACHE_GENERATION_PREFIX + key)
+                    # Поколение переживает любую запись кеша, которую оно защищает
+                    pipe.expire(USER_CACHE_GENERATION_PREFIX + key, self.redis_ttl * 2)
+                pipe.publish(self.channel, json.dumps(keys))
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning("User cache invalidation failed: %s", e)
+
+    def _on_message(self, data: bytes):
+        try:
+            self._evict_local(json.loads(data))
+        except ValueError:
+            logger.warning("Malformed user cache invalidation message: %r", data)
+
+    async def _on_subscribe(self):
+        # Пока подписки не было, могли пропустить инвалидации
+        self._local_generation += 1
+        self._local.clear()
+
+    def start(self, redis: RedisClient):
+        self._redis = redis
+        self._listener = asyncio.create_task(
+            redis.listen(self.channel, self._on_message, on_subscribe=self._on_subscribe)
+        )
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        self._redis = None
+
+
+user_cache = UserCache(
+    local_size=settings.USER_CACHE_LOCAL_SIZE,
+    local_ttl=settings.USER_CACHE_LOCAL_TTL,
+    redis_ttl=settings.USER_CACHE_REDIS_TTL,
+    channel=settings.USER_CACHE_CHANNEL
+)
+
+
+def _collect_metrics():
+    stats = user_cache.stats()
+    lookups = Counter("user_cache_lookups_total", "User cache lookups by result", ("result",))
+    lookups.inc("local_hit", amount=stats["local_hits"])
+    lookups.inc("redis_hit", amount=stats["redis_hits"])
+    lookups.inc("miss", amount=stats["misses"])
+    invalidations = Counter("user_cache_invalidations_total", "Explicit user cache invalidations")
+    invalidations.inc(amount=stats["invalidations"])
+    size = Gauge("user_cache_local_entries", "Entries in the in-process user cache")
+    size.set(stats["local_size"])
+    return [lookups, invalidations, size]
+
+
+registry.add_collector(_collect_metrics)
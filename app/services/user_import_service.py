@@ -0,0 +1,231 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator
+
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from starlette import status
+
+from app.core.config import settings
+from app.crud.auth.read import AuthCRUD
+from app.helpers.users.password_hasher import password_hasher
+from app.schemas.UserSchema import UserSchema
+
+IMPORT_FIELDS = ("name", "email", "password")
+
+# (номер строки, данные, ошибка разбора)
+ImportRows = AsyncIterator[tuple[int, object, str | None]]
+
+
+async def _iter_lines(request: Request) -> AsyncIterator[str]:
+    # Тело читается потоком: в памяти только текущий кусок и неполная строка
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer.strip():
+        yield buffer.rstrip("\r")
+
+
+async def iter_json_rows(request: Request) -> ImportRows:
+    try:
+        data = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON")
+    if not isinstance(data, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a JSON array of users")
+
+    for row, item in enumerate(data, start=1):
+        yield row, item, None
+
+
+async def iter_ndjson_rows(request: Request) -> ImportRows:
+    row = 0
+    async for line in _iter_lines(request):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            yield row, json.loads(line), None
+        except ValueError as e:
+            yield row, None, f"Invalid JSON: {e}"
+
+
+async def iter_csv_rows(request: Request) -> ImportRows:
+    header = None
+    row = 0
+    async for line in _iter_lines(request):
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+
+        if header is None:
+            header = [value.strip().lower() for value in values]
+            missing = [field for field in IMPORT_FIELDS if field not in header]
+            if missing:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"CSV header is missing columns: {', '.join(missing)}"
+                )
+            continue
+
+        row += 1
+        if len(values) != len(header):
+            yield row, None, f"Expected {len(header)} columns, got {len(values)}"
+        else:
+            yield row, dict(zip(header, values)), None
+
+
+ROW_PARSERS = {
+    "application/json": iter_json_rows,
+    "application/x-ndjson": iter_ndjson_rows,
+    "application/jsonl": iter_ndjson_rows,
+    "text/csv": iter_csv_rows,
+}
+
+
+def rows_from_request(request: Request) -> ImportRows:
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    parser = ROW_PARSERS.get(content_type)
+    if parser is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Supported content types: {', '.join(ROW_PARSERS)}"
+        )
+    return parser(request)
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+class UserImportService:
+    """Массовый импорт: пачка проверяется одним запросом к БД, пароли
+    хешируются на всех ядрах, вставка - одним многострочным INSERT."""
+
+    def __init__(
+            self,
+            auth_crud: AuthCRUD,
+            chunk_size: int = settings.USER_IMPORT_CHUNK_SIZE,
+            max_rows: int = settings.USER_IMPORT_MAX_ROWS
+    ):
+        self.auth_crud = auth_crud
+        self.chunk_size = chunk_size
+        self.max_rows = max_rows
+
+    async def import_users(self, rows: ImportRows) -> dict:
+        report = {"total": 0, "created": 0, "conflicts": [], "errors": []}
+        # Имена и email-ы, уже принятые в этом импорте (дубли внутри файла)
+        seen_names: set[str] = set()
+        seen_emails: set[str] = set()
+        chunk: list[tuple[int, UserSchema]] = []
+
+        async for row, data, error in rows:
+            if row > self.max_rows:
+                report["errors"].append({
+                    "row": row,
+                    "error": f"Import is limited to {self.max_rows} rows, the rest was skipped"
+                })
+                break
+            report["total"] = row
+
+            user = self._validate(row, data, error, report)
+            if user is None:
+                continue
+
+            duplicates = []
+            if user.name in seen_names:
+                duplicates.append(("name", user.name))
+            if user.email in seen_emails:
+                duplicates.append(("email", user.email))
+            if duplicates:
+                self._add_conflicts(report, row, duplicates, "Duplicate within the import")
+                continue
+            seen_names.add(user.name)
+            seen_emails.add(user.email)
+
+            chunk.append((row, user))
+            if len(chunk) >= self.chunk_size:
+                await self._import_chunk(chunk, report)
+                chunk = []
+
+        if chunk:
+            await self._import_chunk(chunk, report)
+        return report
+
+    @staticmethod
+    def _validate(row: int, data, error: str | None, report: dict) -> UserSchema | None:
+        if error is None and not isinstance(data, dict):
+            error = "Expected an object with name, email and password"
+
+        user = None
+        if error is None:
+            try:
+                user = UserSchema.model_validate({field: data.get(field) for field in IMPORT_FIELDS})
+            except ValidationError as e:
+                error = _validation_message(e)
+
+        if user is not None and len(user.password or "") < 8:
+            error = "Password must be at least 8 characters"
+
+        if error is not None:
+            report["errors"].append({"row": row, "error": error})
+            return None
+        return user
+
+    @staticmethod
+    def _add_conflicts(report: dict, row: int, fields: list[tuple[str, str]], reason: str):
+        for field, value in fields:
+            report["conflicts"].append({"row": row, "field": field, "value": value, "reason": reason})
+
+    @staticmethod
+    def _taken_fields(user: UserSchema, taken_names: set[str], taken_emails: set[str]) -> list[tuple[str, str]]:
+        fields = []
+        if user.name in taken_names:
+            fields.append(("name", user.name))
+        if user.email in taken_emails:
+            fields.append(("email", user.email))
+        return fields
+
+    async def _import_chunk(self, chunk: list[tuple[int, UserSchema]], report: dict):
+        taken_names, taken_emails = await self.auth_crud.find_taken_identities(
+            [user.name for _, user in chunk],
+            [user.email for _, user in chunk]
+        )
+
+        fresh = []
+        for row, user in chunk:
+            taken = self._taken_fields(user, taken_names, taken_emails)
+            if taken:
+                self._add_conflicts(report, row, taken, "Already exists")
+            else:
+                fresh.append((row, user))
+        if not fresh:
+            return
+
+        hashed = await password_hasher.hash_many([user.password for _, user in fresh])
+        inserted = await self.auth_crud.insert_users([
+            {"name": user.name, "email": user.email, "password": password}
+            for (_, user), password in zip(fresh, hashed)
+        ])
+        report["created"] += len(inserted)
+
+        # Не вставились - значит, между проверкой и INSERT их занял другой запрос
+        inserted_emails = {item.email for item in inserted}
+        lost = [(row, user) for row, user in fresh if user.email not in inserted_emails]
+        if lost:
+            taken_names, taken_emails = await self.auth_crud.find_taken_identities(
+                [user.name for _, user in lost],
+                [user.email for _, user in lost]
+            )
+            for row, user in lost:
+                taken = self._taken_fields(user, taken_names, taken_emails) or [("email", user.email)]
+                self._add_conflicts(report, row, taken, "Already exists")
@@ -1,19 +1,27 @@
+from datetime import datetime
+
 from fastapi import Depends, HTTPException
 from jose import JWTError
 from starlette import status
 
+from app.core.config import settings
 from app.crud.auth.read import AuthCRUD
+from app.helpers.pagination import encode_cursor, decode_cursor
+from app.schemas.AvailabilityRequest import AvailabilityRequest
 from app.schemas.UserSchema import UserSchema, UserUpdateSchema
 from app.schemas.oauth2_scheme import oauth2_scheme
 from app.security.security import decode_token, create_access_token, create_refresh_token
+from app.services.user_cache import UserCache
 
 
 class UserService:
     def __init__(
             self,
-            auth_crud: AuthCRUD
+            auth_crud: AuthCRUD,
+            user_cache: UserCache
     ):
         self.auth_crud = auth_crud
+        self.user_cache = user_cache
 
     async def get_current_user(self, token: str = Depends(oauth2_scheme)):
         credentials_exception = HTTPException(
@@ -25,12 +33,15 @@ class UserService:
             if not token:
                 raise credentials_exception
 
-            payload = decode_token(token)
+            payload = await decode_token(token)
             if payload.get("type") != "access" or not payload.get("sub"):
                 raise credentials_exception
             email = payload.get("sub")
 
-            user = await self.auth_crud.get_user_by_email(email)
+            # Сначала кеш (процесс, затем Redis), в БД - только при промахе
+            user = await self.user_cache.get_by_email(
+                email, lambda: self.auth_crud.get_user_by_email(email)
+            )
 
             if not user:
                 raise credentials_exception
@@ -40,8 +51,10 @@ class UserService:
             raise credentials_exception
 
     async def check_if_user_exists(self, userdata: UserSchema):
-        email_exists = await self.auth_crud.get_user_by_email(userdata.email)
-        if email_exists:
+        taken_names, taken_emails = await self.auth_crud.find_taken_identities(
+            [userdata.name], [userdata.email]
+        )
+        if taken_emails:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail={
@@ -50,8 +63,7 @@ class UserService:
                     "field": "email"
                 }
             )
-        name_exists = await self.auth_crud.get_user_by_name(userdata.name)
-        if name_exists:
+        if taken_names:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail={
@@ -62,11 +74,21 @@ class UserService:
             )
         return {"success": True}
 
+    async def check_availability(self, request: AvailabilityRequest):
+        taken_names, taken_emails = await self.auth_crud.find_taken_identities(
+            request.names, request.emails
+        )
+        return {
+            "names": {name: name not in taken_names for name in request.names},
+            "emails": {email: email not in taken_emails for email in request.emails},
+        }
+
     async def get_users(
             self,
             user_id: int | None = None,
             skip: int = 0,
-            limit: int = 100
+            limit: int = 100,
+            cursor: str | None = None
     ):
         if limit <= 0:
             raise HTTPException(
@@ -80,7 +102,7 @@ class UserService:
             )
 
         if user_id:
-            user = await self.auth_crud.get_user_by_id(user_id)
+            user = await self.auth_crud.get_user_row(user_id)
             if not user:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -88,8 +110,104 @@ class UserService:
                 )
             return [user]
 
+        if cursor is not None:
+            return await self.get_users_page(cursor, limit, skip)
+
+        # Offset-режим оставлен для обратной совместимости
         return await self.auth_crud.get_users(skip, limit)
 
+    async def get_users_page(self, cursor: str, limit: int, skip: int = 0):
+        if skip:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="skip can't be used together with cursor"
+            )
+
+        # Пустой курсор - первая страница
+        after_id = None
+        if cursor:
+            after_id = decode_cursor(cursor, 1)[0]
+            if not isinstance(after_id, int):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor"
+                )
+
+        # Берём на одну запись больше, чтобы узнать, есть ли следующая страница
+        users = await self.auth_crud.get_users_after(after_id, limit + 1)
+        items = users[:limit]
+        next_cursor = encode_cursor(items[-1]["id"]) if len(users) > limit else None
+
+        return {"items": items, "next_cursor": next_cursor}
+
+    async def search_users(
+            self,
+            q: str | None,
+            field: str = "any",
+            mode: str = "prefix",
+            domain: str | None = None,
+            limit: int = 20,
+            cursor: str | None = None
+    ):
+        text = (q or "").strip().lower() or None
+        domain = (domain or "").strip().lower().lstrip("@") or None
+        if not text and not domain:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="q or domain must be provided"
+            )
+        if text and mode == "contains" and len(text) < 3:
+            # Короче трёх символов триграммный индекс не работает
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Substring search needs at least 3 characters"
+            )
+
+        # Курсор: (sort_key, id) последней записи - lower() совпавшего поля и id
+        after = None
+        if cursor:
+            after = decode_cursor(cursor, 2)
+            if not isinstance(after[0], str) or not isinstance(after[1], int):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor"
+                )
+
+        rows = await self.auth_crud.search_users(text, field, mode, domain, after, limit + 1)
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            next_cursor = encode_cursor(last["sort_key"], last["id"])
+
+        for row in page:
+            del row["sort_key"]
+        return {"items": page, "next_cursor": next_cursor}
+
+    async def get_changes(self, cursor: str | None, limit: int):
+        # Курсор: (changed_at, id, deleted) последней отданной записи
+        after = None
+        if cursor:
+            changed_at, user_id, deleted = decode_cursor(cursor, 3)
+            try:
+                after = (datetime.fromisoformat(changed_at), user_id, deleted)
+            except (TypeError, ValueError):
+                after = None
+            if after is None or not isinstance(user_id, int) or not isinstance(deleted, bool):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor"
+                )
+
+        rows = await self.auth_crud.get_changes(after, settings.USER_CHANGES_SETTLE_SECONDS, limit + 1)
+        items = rows[:limit]
+        next_cursor = cursor or None
+        if items:
+            last = items[-1]
+            next_cursor = encode_cursor(last["changed_at"].isoformat(), last["id"], last["deleted"])
+
+        return {"items": items, "next_cursor": next_cursor, "has_more": len(rows) > limit}
+
     async def post_user(
             self,
             userdata: UserSchema,
@@ -105,9 +223,15 @@ class UserService:
                 }
             )
 
+        # Занятые имя или email отсекаем одним SELECT до bcrypt, чтобы повторные
+        # регистрации не тратили процесс хеширования. Гонку между проверкой и
+        # INSERT ловит ON CONFLICT - тогда уточняем, какое поле занято
         await self.check_if_user_exists(userdata)
-
         new_user = await self.auth_crud.create_user(userdata)
+        if new_user is None:
+            await self.check_if_user_exists(userdata)
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already exists")
+        await self.user_cache.invalidate(new_user.id, [new_user.email])
 
         return {
             "access_token": create_access_token(
@@ -127,24 +251,17 @@ class UserService:
         if not any([userdata.name, userdata.email, userdata.password]):
             raise HTTPException(status_code=400, detail="No fields to update provided")
 
-        async with self.auth_crud.db.begin():
-            db_user = await self.auth_crud.get_user_by_id(user_id)
-
-            fields_to_update = {}
+        fields_to_update = {}
+        if userdata.name is not None:
+            fields_to_update["name"] = userdata.name
+        if userdata.email is not None:
+            fields_to_update["email"] = userdata.email
 
-            if userdata.name is not None:
-                fields_to_update["name"] = userdata.name
-            if userdata.email is not None:
-                fields_to_update["email"] = userdata.email
-
-            if fields_to_update:
-                db_user = await self.auth_crud.update_user_fields(db_user, **fields_to_update)
-
-            if userdata.password is not None:
-                db_user = await self.auth_crud.update_user_password(db_user, userdata.password)
-
-        # здесь транзакция уже закоммичена
-        await self.auth_crud.db.refresh(db_user)
+        # Один UPDATE ... RETURNING: без предварительного SELECT и refresh
+        db_user, old_email = await self.auth_crud.update_user(
+            user_id, fields_to_update, userdata.password
+        )
+        await self.user_cache.invalidate(db_user.id, [old_email, db_user.email])
 
         return db_user
 
@@ -152,5 +269,7 @@ class UserService:
             self,
             user_id: int
     ):
-        user = await self.auth_crud.get_user_by_id(user_id)
-        return await self.auth_crud.delete_user(user)
+        deleted_user = await self.auth_crud.delete_user(user_id)
+        await self.user_cache.invalidate(deleted_user.id, [deleted_user.email])
+
+        return deleted_user
@@ -0,0 +1,7 @@
+import os
+
+# Настройки приложения обязательны при импорте; для бенчмарков внешние сервисы не нужны
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("EMAIL_USER", "bench@example.com")
+os.environ.setdefault("EMAIL_PASSWORD", "")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-0123456789abcdef")
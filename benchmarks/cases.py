@@ -0,0 +1,175 @@
+"""Бенчмарки горячих путей аутентификации. Внешние сервисы не нужны:
+БД - SQLite в памяти (aiosqlite), Redis и SMTP не используются."""
+import asyncio
+
+from benchmarks import _env  # noqa: F401
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.crud.auth.read import AuthCRUD
+from app.db.models import Base, User
+from app.helpers.fast_json import dumps
+from app.helpers.users.helpers import hash_password, verify_password
+from app.schemas.UserSchema import UserSchema
+from app.security import security
+
+CASES = {}
+
+
+def case(name: str, number: int, is_async: bool = False):
+    def decorator(func):
+        CASES[name] = {"setup": func, "number": number, "async": is_async}
+        return func
+    return decorator
+
+
+@case("jwt.create_access_token", number=20000)
+def jwt_create():
+    return lambda: security.create_access_token({"sub": "user@example.com", "type": "access"})
+
+
+@case("jwt.decode_token", number=20000, is_async=True)
+async def jwt_decode():
+    token = security.create_access_token({"sub": "user@example.com", "type": "access"})
+
+    async def run():
+        # Без кеша проверенных токенов - полная проверка подписи
+        security.verified_tokens.clear()
+        await security.decode_token(token)
+    return run
+
+
+@case("jwt.decode_token_cached", number=50000, is_async=True)
+async def jwt_decode_cached():
+    token = security.create_access_token({"sub": "user@example.com", "type": "access"})
+
+    async def run():
+        await security.decode_token(token)
+    return run
+
+
+@case("password.hash", number=5)
+def password_hash():
+    return lambda: hash_password("correct horse battery staple")
+
+
+@case("password.verify", number=5)
+def password_verify():
+    hashed = hash_password("correct horse battery staple")
+    return lambda: verify_password("correct horse battery staple", hashed)
+
+
+USER_DATA = {"id": 1, "name": "user1", "email": "user1@example.com", "password": "secret-password"}
+
+
+@case("schema.user_validate", number=20000)
+def schema_validate():
+    return lambda: UserSchema.model_validate(USER_DATA)
+
+
+@case("schema.user_dump_json", number=50000)
+def schema_dump():
+    user = UserSchema.model_validate(USER_DATA)
+    return user.model_dump_json
+
+
+USERS = 1000
+# Сессии и движки фикстур: потоки aiosqlite не daemon, без закрытия процесс не завершится
+FIXTURES = []
+
+
+async def _crud_fixture():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False}
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(User.__table__.insert(), [
+            {"name": f"user{i}", "email": f"user{i}@example.com", "password": "x"}
+            for i in range(1, USERS + 1)
+        ])
+    session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+    FIXTURES.append((session, engine))
+    return AuthCRUD(session)
+
+
+async def close_fixtures():
+    engines = {}
+    for session, engine in FIXTURES:
+        await session.close()
+        engines[id(engine)] = engine
+    for engine in engines.values():
+        await engine.dispose()
+    FIXTURES.clear()
+
+
+def crud_case(name: str, number: int = 2000):
+    def decorator(make_query):
+        async def setup():
+            crud = await _crud_fixture()
+
+            async def run():
+                await make_query(crud)
+                # Без identity map от предыдущих итераций
+                crud.db.expunge_all()
+            return run
+        return case(name, number, is_async=True)(setup)
+    return decorator
+
+
+@crud_case("crud.get_user_by_email")
+async def crud_by_email(crud: AuthCRUD):
+    await crud.get_user_by_email("user500@example.com")
+
+
+@crud_case("crud.get_user_by_id")
+async def crud_by_id(crud: AuthCRUD):
+    await crud.get_user_by_id(500)
+
+
+@case("crud.get_user_by_email_20_concurrent", number=200, is_async=True)
+async def crud_by_email_concurrent():
+    # 20 запросов (своя сессия у каждого) за одним пользователем одновременно
+    base = await _crud_fixture()
+    cruds = [AuthCRUD(AsyncSession(base.db.bind, expire_on_commit=False)) for _ in range(20)]
+    FIXTURES.extend((crud.db, base.db.bind) for crud in cruds)
+
+    async def run():
+        await asyncio.gather(*(crud.get_user_by_email("user500@example.com") for crud in cruds))
+        for crud in cruds:
+            crud.db.expunge_all()
+    return run
+
+
+@crud_case("crud.get_users_page_100", number=500)
+async def crud_users_page(crud: AuthCRUD):
+    await crud.get_users_after(500, 100)
+
+
+USER_LIST = TypeAdapter(list[UserSchema])
+
+
+@crud_case("read.users_page_100_orm", number=500)
+async def read_users_page_orm(crud: AuthCRUD):
+    # Прежний путь GET /users: ORM-объекты со всеми колонками -> response_model -> JSON
+    result = await crud.db.execute(select(User).order_by(User.id).where(User.id > 500).limit(100))
+    USER_LIST.dump_json(USER_LIST.validate_python(result.scalars().all(), from_attributes=True))
+
+
+@crud_case("read.users_page_100_lean", number=500)
+async def read_users_page_lean(crud: AuthCRUD):
+    # Core-строки нужных колонок -> сразу в JSON
+    dumps(await crud.get_users_after(500, 100))
+
+
+@crud_case("crud.find_taken_identities_20")
+async def crud_taken(crud: AuthCRUD):
+    await crud.find_taken_identities(
+        [f"user{i}" for i in range(10)],
+        [f"user{i}@example.com" for i in range(990, 1000)]
+    )
@@ -0,0 +1,101 @@
+"""Сравнение JWT-бэкендов: корректность и скорость encode/decode.
+
+    python -m benchmarks.jwt_backends [-n 20000]
+"""
+import argparse
+import time
+import timeit
+
+from benchmarks import _env  # noqa: F401
+from jose import JWTError
+
+from app.security.jwt_backends import JWT_BACKENDS
+from app.security.token_cache import VerifiedTokenCache
+
+KEY = "benchmark-secret-key-0123456789abcdef"
+ALGORITHM = "HS256"
+
+
+def load_backends() -> dict:
+    backends = {}
+    for name, backend_cls in JWT_BACKENDS.items():
+        try:
+            backends[name] = backend_cls()
+        except ImportError:
+            print(f"{name}: skipped (not installed)")
+    return backends
+
+
+def claims(ttl: int = 1800) -> dict:
+    return {"sub": "user@example.com", "type": "access", "exp": int(time.time()) + ttl, "jti": "0" * 32}
+
+
+def rejects(backend, token: str, key: str = KEY) -> bool:
+    try:
+        backend.decode(token, key, ALGORITHM)
+    except JWTError:
+        return True
+    return False
+
+
+def check_correctness(backends: dict) -> dict[str, bool]:
+    """Бэкенд годится, если понимает токены всех остальных и отвергает плохие."""
+    results = {}
+    for name, backend in backends.items():
+        ok = True
+        for other in backends.values():
+            token = other.encode(claims(), KEY, ALGORITHM)
+            ok &= backend.decode(token, KEY, ALGORITHM)["sub"] == "user@example.com"
+
+        token = backend.encode(claims(), KEY, ALGORITHM)
+        header, payload, signature = token.split(".")
+        tampered = ".".join([header, payload, ("A" if signature[0] != "A" else "B") + signature[1:]])
+        ok &= rejects(backend, tampered)
+        ok &= rejects(backend, token, key="another-secret-key-0123456789abcdef")
+        ok &= rejects(backend, backend.encode(claims(ttl=-10), KEY, ALGORITHM))
+        ok &= rejects(backend, "not.a.token")
+        results[name] = ok
+    return results
+
+
+def per_second(func, number: int) -> float:
+    return number / min(timeit.repeat(func, number=number, repeat=3))
+
+
+def run(number: int) -> list[dict]:
+    backends = load_backends()
+    correctness = check_correctness(backends)
+    results = []
+
+    for name, backend in backends.items():
+        token = backend.encode(claims(), KEY, ALGORITHM)
+        cache = VerifiedTokenCache(1000)
+
+        def cached_decode():
+            payload = cache.get(token)
+            if payload is None:
+                cache.put(token, backend.decode(token, KEY, ALGORITHM))
+
+        results.append({
+            "backend": name,
+            "correct": correctness[name],
+            "encode_per_sec": per_second(lambda: backend.encode(claims(), KEY, ALGORITHM), number),
+            "decode_per_sec": per_second(lambda: backend.decode(token, KEY, ALGORITHM), number),
+            "cached_decode_per_sec": per_second(cached_decode, number),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'correct':<8} {'encode/s':>12} {'decode/s':>12} {'cached/s':>12}")
+    for row in run(args.number):
+        print(f"{row['backend']:<8} {str(row['correct']):<8} {row['encode_per_sec']:>12,.0f} "
+              f"{row['decode_per_sec']:>12,.0f} {row['cached_decode_per_sec']:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Пропускная способность входа при разной стоимости bcrypt.
+
+    python -m benchmarks.password_cost [--rounds 10 11 12 13] [-n 32]
+
+Для каждой стоимости: время одной проверки на одном ядре и logins/s на ядро,
+плюс реальная пропускная способность пула PasswordHasher на всех ядрах.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks import _env  # noqa: F401
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.helpers.users.password_hasher import PasswordHasher, available_cpus
+from app.helpers.users.password_policy import measure_verify
+
+PASSWORD = "correct horse battery staple"
+
+
+async def pool_logins_per_sec(hasher: PasswordHasher, hashed: str, number: int) -> float:
+    # Прогрев: все процессы пула запущены до замера
+    await asyncio.gather(*(hasher.verify(PASSWORD, hashed) for _ in range(hasher.workers)))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(hasher.verify(PASSWORD, hashed) for _ in range(number)))
+    return number / (time.perf_counter() - start)
+
+
+def run(rounds_list: list[int], number: int) -> list[dict]:
+    hasher = PasswordHasher(queue_size=number)
+    results = []
+    try:
+        for rounds in rounds_list:
+            hashed = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds).hash(PASSWORD)
+            seconds = measure_verify(rounds)
+            pool_rate = asyncio.run(pool_logins_per_sec(hasher, hashed, number))
+            results.append({
+                "rounds": rounds,
+                "verify_ms": seconds * 1000,
+                "logins_per_sec_per_core": 1 / seconds,
+                "pool_logins_per_sec": pool_rate,
+                "pool_logins_per_sec_per_core": pool_rate / hasher.workers,
+            })
+    finally:
+        hasher.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    configured = settings.PASSWORD_BCRYPT_ROUNDS
+    parser.add_argument("--rounds", type=int, nargs="+", default=[configured - 1, configured, configured + 1])
+    parser.add_argument("-n", "--number", type=int, default=4 * available_cpus(),
+                        help="verifications per pool measurement")
+    args = parser.parse_args()
+
+    print(f"cores: {available_cpus()}, configured rounds: {configured}")
+    print(f"{'rounds':<7} {'verify ms':>10} {'logins/s/core':>14} {'pool logins/s':>14} {'pool/core':>10}")
+    for row in run(args.rounds, args.number):
+        print(f"{row['rounds']:<7} {row['verify_ms']:>10.1f} {row['logins_per_sec_per_core']:>14.1f} "
+              f"{row['pool_logins_per_sec']:>14.1f} {row['pool_logins_per_sec_per_core']:>10.1f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
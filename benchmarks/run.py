@@ -0,0 +1,135 @@
+"""Запуск бенчмарков и сравнение с сохранённым baseline.
+
+    python -m benchmarks.run                      # прогон + сравнение с baseline.json
+    python -m benchmarks.run -k jwt               # только кейсы, содержащие "jwt"
+    python -m benchmarks.run --save-baseline      # записать текущие результаты как baseline
+
+Результаты пишутся в JSON (--output). Код возврата 1, если какой-то кейс
+медленнее baseline больше, чем на --tolerance.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.cases import CASES, close_fixtures
+
+BENCH_DIR = Path(__file__).parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "latest.json"
+
+
+def measure_sync(func, number: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure_async(loop: asyncio.AbstractEventLoop, func, number: int, repeat: int) -> float:
+    async def batch():
+        start = time.perf_counter()
+        for _ in range(number):
+            await func()
+        return time.perf_counter() - start
+
+    return min(loop.run_until_complete(batch()) for _ in range(repeat))
+
+
+def run_cases(selected: list[str], repeat: int, scale: float) -> dict:
+    results = {}
+    loop = asyncio.new_event_loop()
+    try:
+        for name in selected:
+            spec = CASES[name]
+            number = max(1, int(spec["number"] * scale))
+            if spec["async"]:
+                func = loop.run_until_complete(spec["setup"]())
+                func_time = measure_async(loop, func, number, repeat)
+            else:
+                func = spec["setup"]()
+                func_time = measure_sync(func, number, repeat)
+
+            results[name] = {
+                "ops_per_sec": number / func_time,
+                "mean_us": func_time / number * 1e6,
+                "number": number,
+            }
+            print(f"{name:<36} {results[name]['ops_per_sec']:>14,.1f} ops/s "
+                  f"{results[name]['mean_us']:>12,.1f} us/op", flush=True)
+    finally:
+        loop.run_until_complete(close_fixtures())
+        loop.close()
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    print(f"\n{'case':<36} {'baseline':>14} {'current':>14} {'change':>8}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<36} {'-':>14} {current['ops_per_sec']:>14,.1f} {'new':>8}")
+            continue
+
+        change = current["ops_per_sec"] / previous["ops_per_sec"] - 1
+        flag = ""
+        if change < -tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<36} {previous['ops_per_sec']:>14,.1f} {current['ops_per_sec']:>14,.1f} "
+              f"{change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="keyword", help="run only cases whose name contains this substring")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs per case")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply iteration counts")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown, 0.2 = 20%%")
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    selected = [name for name in CASES if not args.keyword or args.keyword in name]
+    results = run_cases(selected, args.repeat, args.scale)
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        baseline = {}
+        if args.baseline.exists():
+            baseline = json.loads(args.baseline.read_text())["results"]
+        baseline.update(results)
+        args.baseline.write_text(json.dumps({**report, "results": baseline}, indent=2))
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}, run with --save-baseline first")
+        return
+
+    regressions = compare(results, json.loads(args.baseline.read_text())["results"], args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()